@@ -0,0 +1,53 @@
+from django.test import Client
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from fitnessmanager_api import customer_cache
+from fitnessmanager_api.views import CustomerData
+
+
+def _get_customer_data(user):
+    request = APIRequestFactory().get("/customer-data/", {"lang": "es"})
+    force_authenticate(request, user=user)
+    response = CustomerData.as_view()(request)
+    assert response.status_code == 200, response.status_code
+
+
+def test_list(benchmark, staff):
+    benchmark.pedantic(
+        _get_customer_data, args=(staff,), setup=customer_cache.invalidate_all, rounds=10
+    )
+
+
+def test_list_cached(benchmark, staff):
+    _get_customer_data(staff)
+    benchmark(_get_customer_data, staff)
+
+
+def test_put(benchmark, customer):
+    # every key goes through the translated-key lookup; the writes are rolled
+    # back with the test's transaction
+    data = {
+        "Nombre": customer.first_name,
+        "Notas": "benchmark",
+        "Fecha de Nacimiento": "1990-01-01",
+        "Peso": "72.50",
+    }
+
+    def put():
+        request = APIRequestFactory().put("/customer-data/?lang=es", data, format="json")
+        force_authenticate(request, user=customer)
+        response = CustomerData.as_view()(request)
+        assert response.status_code == 200, response.status_code
+
+    benchmark(put)
+
+
+def test_admin_changelist(benchmark, staff):
+    client = Client()
+    client.force_login(staff)
+
+    def changelist():
+        response = client.get("/admin/fitnessmanager_api/customer/")
+        assert response.status_code == 200, response.status_code
+
+    benchmark(changelist)
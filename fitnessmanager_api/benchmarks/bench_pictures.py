@@ -0,0 +1,11 @@
+import pytest
+
+from fitnessmanager_api import imaging
+
+
+@pytest.mark.parametrize("size", [None, imaging.THUMBNAIL_SIZE], ids=["original", "thumbnail"])
+@pytest.mark.parametrize("shape", imaging.SHAPES)
+def test_render_picture(benchmark, customer, shape, size):
+    # the rendering alone, without the picture cache
+    transform = imaging.Transform(size, shape, "png", None)
+    benchmark(imaging.render_picture, customer.profile_picture.path, transform)
@@ -0,0 +1,59 @@
+# Benchmarks of customer list serialization, PUT translation, the profile
+# picture shapes and the admin changelist, on data made by generate_gym_data:
+#
+#   SQLITE_PATH=bench.sqlite3 pytest benchmarks --benchmark-json=results.json
+#
+# Without SQLITE_PATH they run against the Postgres database configured by
+# the POSTGRES_* variables (in a test database created next to it). Compare
+# two result files with pytest-benchmark compare.
+import io
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from fitnessmanager_api.models import Customer
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("gym data")
+    group.addoption("--gym-customers", type=int, default=1_000)
+    group.addoption("--gym-years", type=int, default=3)
+    group.addoption("--gym-pictures", type=int, default=5)
+
+
+@pytest.fixture(scope="session")
+def gym_data(request, tmp_path_factory, django_db_setup, django_db_blocker):
+    media_root = tmp_path_factory.mktemp("media")
+    # generated pictures and their variants stay out of the project directory
+    settings = override_settings(
+        MEDIA_ROOT=str(media_root),
+        PROFILE_PICTURE_CACHE_DIR=str(media_root / "profile_picture_cache"),
+    )
+    settings.enable()
+    with django_db_blocker.unblock():
+        call_command(
+            "generate_gym_data",
+            customers=request.config.getoption("--gym-customers"),
+            years=request.config.getoption("--gym-years"),
+            pictures=request.config.getoption("--gym-pictures"),
+            stdout=io.StringIO(),
+        )
+        staff = Customer.objects.create_superuser(
+            "benchmark@example.com", "password", first_name="Bench", last_name="Mark"
+        )
+        customer = Customer.objects.exclude(profile_picture="").exclude(
+            profile_picture=None
+        ).first()
+    yield staff, customer
+    settings.disable()
+
+
+@pytest.fixture
+def staff(gym_data, db):
+    return gym_data[0]
+
+
+@pytest.fixture
+def customer(gym_data, db):
+    return gym_data[1]
@@ -1,21 +1,62 @@
 from django.contrib import admin
-from django.urls import reverse
+from django.http import StreamingHttpResponse
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Subquery, Sum, Value, When
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils import timezone
 from django.utils.html import format_html
-from django.utils.translation import gettext as _
+from django.utils.translation import gettext_lazy as _
 
-from .models import Customer, Payment
+from . import imaging
+from .models import Attendance, Customer, Payment
+from .search import search_customers
+
+
+# small WebP variant rendered eagerly on upload, see derivatives.VARIANTS
+ADMIN_THUMBNAIL_TRANSFORM = imaging.Transform(
+    imaging.THUMBNAIL_SIZE, "original", "webp", imaging.DEFAULT_QUALITY["webp"]
+)
+
+
+def export_as_csv(modeladmin, request, queryset):
+    # csv_io and views pull in DRF; admin modules are imported by
+    # django.setup(), so they are only loaded when needed
+    from .csv_io import iter_csv
+
+    language = request.LANGUAGE_CODE
+    response = StreamingHttpResponse(iter_csv(queryset, language), content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="{}.csv"'.format(
+        queryset.model._meta.model_name
+    )
+    return response
+export_as_csv.short_description = _('Export selected as CSV')
 
 
 class PaymentInline(admin.TabularInline):
     model = Payment
     extra = 0
+    # older payments are reachable through the "View payments" link
+    recent_months = 12
+
+    def get_queryset(self, request):
+        today = timezone.localdate()
+        first_period = today.year * 12 + today.month - self.recent_months
+        return (
+            super()
+            .get_queryset(request)
+            .for_period((first_period // 12, first_period % 12 + 1), (9999, 12))
+            .order_by("-paid_year", "-paid_month")
+        )
 
 
 class CustomerAdmin(admin.ModelAdmin):
     model = Customer
 
     inlines = [PaymentInline]
+    actions = [export_as_csv]
     exclude = ("password", "is_active", "groups", "user_permissions")
+    # maintained from the payments, see membership.py
+    readonly_fields = ("active_membership", "membership_start_date", "membership_end_date")
 
     list_display = (
         "first_name",
@@ -28,14 +69,65 @@ class CustomerAdmin(admin.ModelAdmin):
         "membership_start_date",
         "notes",
         "payment_link",
+        "last_payment_date",
+        "total_paid",
+        "months_in_arrears",
         "active_membership",
         "thumbnail",
     )
 
+    def get_queryset(self, request):
+        # every payment column is a correlated subquery of the changelist
+        # query, so the number of queries does not grow with the page size
+        payments = Payment.objects.filter(customer=OuterRef("pk")).order_by().values("customer")
+        today = timezone.localdate()
+        current_period = today.year * 12 + today.month - 1
+
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                last_payment_date=Subquery(payments.annotate(value=Max("date")).values("value")),
+                total_paid=Subquery(payments.annotate(value=Sum("amount")).values("value")),
+                last_paid_period=Subquery(
+                    payments.annotate(
+                        value=Max(F("paid_year") * 12 + F("paid_month") - 1)
+                    ).values("value")
+                ),
+            )
+            .annotate(
+                # stays empty for customers who never paid
+                months_in_arrears=Case(
+                    When(
+                        last_paid_period__lt=current_period,
+                        then=Value(current_period) - F("last_paid_period"),
+                    ),
+                    When(last_paid_period__isnull=False, then=Value(0)),
+                    output_field=IntegerField(),
+                )
+            )
+        )
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:object_id>/thumbnail/",
+                self.admin_site.admin_view(self.thumbnail_view),
+                name="fitnessmanager_api_customer_thumbnail",
+            ),
+        ] + super().get_urls()
+
+    def thumbnail_view(self, request, object_id):
+        from .views import serve_profile_picture
+
+        customer = get_object_or_404(Customer, pk=object_id)
+        return serve_profile_picture(request, customer, ADMIN_THUMBNAIL_TRANSFORM)
+
     def thumbnail(self, obj):
         if obj.profile_picture:
             return format_html(
-                '<img src="{}" width="50" />'.format(obj.profile_picture.url)
+                '<img src="{}" width="50" />',
+                reverse("admin:fitnessmanager_api_customer_thumbnail", args=[obj.pk]),
             )
         else:
             return ""
@@ -44,12 +136,32 @@ class CustomerAdmin(admin.ModelAdmin):
 
     search_fields = ('first_name', 'last_name', 'email', 'phone_number')
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_customers(queryset, search_term), False
+
     def payment_link(self, obj):
         url = reverse('admin:fitnessmanager_api_payment_changelist')
         link_text = _('View payments')
         return format_html('<a href="{}?customer__id={}">{}</a>', url, obj.id, link_text)
     payment_link.short_description = _('Payments')
 
+    def last_payment_date(self, obj):
+        return obj.last_payment_date
+    last_payment_date.short_description = _('Last Payment')
+    last_payment_date.admin_order_field = 'last_payment_date'
+
+    def total_paid(self, obj):
+        return obj.total_paid
+    total_paid.short_description = _('Total Paid')
+    total_paid.admin_order_field = 'total_paid'
+
+    def months_in_arrears(self, obj):
+        return obj.months_in_arrears
+    months_in_arrears.short_description = _('Months in Arrears')
+    months_in_arrears.admin_order_field = 'months_in_arrears'
+
 
 class PaymentAdmin(admin.ModelAdmin):
     list_display = (
@@ -61,7 +173,19 @@ class PaymentAdmin(admin.ModelAdmin):
         "paid_month",
         "paid_year",
     )
+    list_select_related = ("customer",)
+    list_filter = ("paid_year", "paid_month")
+    actions = [export_as_csv]
+
+
+class AttendanceAdmin(admin.ModelAdmin):
+    list_display = ("customer", "checked_in_at")
+    list_select_related = ("customer",)
+    raw_id_fields = ("customer",)
+    # the table grows by every check-in, counting it is not worth it
+    show_full_result_count = False
 
 
 admin.site.register(Customer, CustomerAdmin)
 admin.site.register(Payment, PaymentAdmin)
+admin.site.register(Attendance, AttendanceAdmin)
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class FitnessmanagerApiConfig(AppConfig):
+    name = "fitnessmanager_api"
+
+    def ready(self):
+        from . import instrumentation, signals  # noqa: F401
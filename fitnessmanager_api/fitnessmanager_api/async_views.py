@@ -0,0 +1,139 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.translation import override
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import imaging
+from .authentication import LazyJWTAuthentication
+from .views import (
+    STREAM_CHUNK_SIZE,
+    _get_customer_data,
+    _get_language,
+    _update_customer_data,
+    serve_profile_picture,
+)
+
+
+# Async counterparts of the DRF views in views.py, routed instead of them when
+# settings.ASYNC_VIEWS is set (the default under SERVER_MODE=asgi). DRF does
+# not run async handlers, so authentication is done here with the same
+# backend, and the ORM work runs through sync_to_async while PIL work goes to
+# a dedicated, bounded thread pool. Only sync_to_async threads may use the
+# database: Django closes and health checks connections in those alone.
+
+_image_executor = None
+_image_executor_lock = threading.Lock()
+
+
+class AsyncAPIView(View):
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # token authenticated like APIView, which is exempt as well
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        # only decodes the token, the customer is loaded lazily in a worker
+        # thread by whatever code touches it
+        try:
+            user_auth = LazyJWTAuthentication().authenticate(request)
+        except AuthenticationFailed as exc:
+            return JsonResponse({"detail": str(exc.detail)}, status=401)
+
+        if user_auth is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."}, status=401
+            )
+
+        request.user = user_auth[0]
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except AuthenticationFailed as exc:
+            # raised when the lazily loaded customer turns out to be gone
+            return JsonResponse({"detail": str(exc.detail)}, status=401)
+
+
+class AsyncCustomerData(AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
+        response = await sync_to_async(_get_customer_data)(request)
+        if response.streaming and not response.is_async:
+            # Django's ASGI handler would read a synchronous iterator to the
+            # end before sending anything (stream=true)
+            response.streaming_content = _iterate_in_thread(response.streaming_content)
+        return response
+
+    async def put(self, request, *args, **kwargs):
+        try:
+            customer_data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"message": "Invalid JSON"}, status=400)
+
+        language = _get_language(request)
+        return await sync_to_async(_update_customer_data_in_language)(
+            request.user, customer_data, language
+        )
+
+
+class AsyncGetProfilePicture(AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
+        try:
+            transform = imaging.parse_transform(request.GET)
+        except ValueError as exc:
+            return JsonResponse({"message": str(exc)}, status=400)
+
+        # loads the customer here, so that the image thread does not open a
+        # database connection of its own
+        await sync_to_async(getattr)(request.user, "profile_picture")
+
+        # run_in_executor does not carry the context over, which the
+        # instrumentation needs to attribute the PIL time to this request
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_image_executor(),
+            context.run,
+            serve_profile_picture,
+            request,
+            request.user,
+            transform,
+        )
+
+
+def _update_customer_data_in_language(customer, customer_data, language):
+    # translation activation is thread local, so it happens in the worker thread
+    with override(language):
+        return _update_customer_data(customer, customer_data, language)
+
+
+async def _iterate_in_thread(chunks):
+    # the queryset iterator is read in the sync_to_async thread, a batch of
+    # rows per hop; the response still closes the generator when it is done
+    def read_batch():
+        return b"".join(itertools.islice(chunks, STREAM_CHUNK_SIZE))
+
+    while True:
+        data = await sync_to_async(read_batch)()
+        if not data:
+            break
+        yield data
+
+
+def _get_image_executor():
+    global _image_executor
+
+    with _image_executor_lock:
+        if _image_executor is None:
+            _image_executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_THREADS, thread_name_prefix="imaging"
+            )
+        return _image_executor
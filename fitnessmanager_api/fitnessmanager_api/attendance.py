@@ -0,0 +1,131 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+
+from .models import Attendance, Customer
+
+
+logger = logging.getLogger(__name__)
+
+# Check-ins are appended to an in-process buffer and written with a single
+# bulk_create once ATTENDANCE_BATCH_SIZE rows are pending or the oldest one
+# has waited ATTENDANCE_FLUSH_INTERVAL seconds, whichever comes first. Every
+# worker process has its own buffer; what is still pending when a process is
+# killed without running its exit handlers is lost. ATTENDANCE_BATCH_SIZE = 1
+# writes every check-in immediately.
+
+_pending = []
+_lock = threading.Lock()
+_timer = None
+
+
+def record_check_in(customer_id, checked_in_at):
+    with _lock:
+        _pending.append(Attendance(customer_id=customer_id, checked_in_at=checked_in_at))
+        if len(_pending) < settings.ATTENDANCE_BATCH_SIZE:
+            _schedule_flush()
+            return
+        batch = _take_pending()
+
+    _write(batch)
+
+
+def flush():
+    with _lock:
+        batch = _take_pending()
+    _write(batch)
+    return len(batch)
+
+
+def _schedule_flush():
+    # must be called with _lock held
+    global _timer
+
+    if _timer is None:
+        _timer = threading.Timer(settings.ATTENDANCE_FLUSH_INTERVAL, _flush_from_timer)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _take_pending():
+    # must be called with _lock held
+    global _timer
+
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+    batch = _pending[:]
+    _pending.clear()
+    return batch
+
+
+def _flush_from_timer():
+    try:
+        flush()
+    finally:
+        # the timer thread opened its own connection
+        connection.close()
+
+
+def _write(batch):
+    # runs in the request thread, the timer thread and at exit: failures are
+    # logged and never raised, the check-in has already been accepted
+    if not batch:
+        return
+
+    started = time.perf_counter()
+    try:
+        try:
+            _bulk_create(batch)
+        except IntegrityError:
+            # a customer was deleted while their check-in was buffered
+            batch = _drop_deleted_customers(batch)
+            _bulk_create(batch)
+    except IntegrityError:
+        # rejected rows would be rejected again on every retry
+        logger.exception("Writing %d check-ins failed, dropping them", len(batch))
+        return
+    except DatabaseError:
+        logger.exception("Writing %d check-ins failed, retrying with the next batch", len(batch))
+        _requeue(batch)
+        return
+    except Exception:
+        logger.exception("Writing %d check-ins failed, dropping them", len(batch))
+        return
+
+    logger.debug("Wrote %d check-ins in %.3fs", len(batch), time.perf_counter() - started)
+
+
+def _drop_deleted_customers(batch):
+    existing = set(
+        Customer.objects.filter(
+            pk__in={attendance.customer_id for attendance in batch}
+        ).values_list("pk", flat=True)
+    )
+    kept = [attendance for attendance in batch if attendance.customer_id in existing]
+    if len(kept) < len(batch):
+        logger.warning("Dropping %d check-ins of deleted customers", len(batch) - len(kept))
+    return kept
+
+
+def _bulk_create(batch):
+    # foreign keys are checked when the transaction commits on PostgreSQL
+    with transaction.atomic():
+        Attendance.objects.bulk_create(batch)
+
+
+def _requeue(batch):
+    with _lock:
+        room = settings.ATTENDANCE_MAX_PENDING - len(_pending)
+        if room < len(batch):
+            logger.error("Check-in buffer is full, dropping %d check-ins", len(batch) - max(room, 0))
+        _pending[:0] = batch[: max(room, 0)]
+        if _pending:
+            _schedule_flush()
+
+
+atexit.register(flush)
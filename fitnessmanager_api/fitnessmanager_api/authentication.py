@@ -0,0 +1,176 @@
+import copy
+import datetime
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import BlacklistedToken, Customer
+
+
+# claims copied into every token so that permission checks and views that
+# only need them never have to load the customer. They are read from the
+# database again on every refresh, so a change to them takes effect within
+# one ACCESS_TOKEN_LIFETIME.
+CUSTOMER_CLAIMS = ("email", "first_name", "last_name", "is_staff", "is_active")
+
+_users = OrderedDict()
+_users_lock = threading.Lock()
+
+
+class CustomerTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in CUSTOMER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class CustomerTokenRefreshSerializer(TokenRefreshSerializer):
+    # same as TokenRefreshSerializer.validate, with the claims stamped again
+    # from the customer's row and the blacklist kept in the BlacklistedToken
+    # table instead of the token_blacklist app's tables
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if is_blacklisted(refresh):
+            raise InvalidToken("Token is blacklisted")
+
+        try:
+            customer = Customer.objects.get(
+                **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+            )
+        except (KeyError, Customer.DoesNotExist):
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not customer.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        for claim in CUSTOMER_CLAIMS:
+            refresh[claim] = getattr(customer, claim)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # the unique jti makes a concurrent replay of the same token fail
+            if api_settings.BLACKLIST_AFTER_ROTATION and not blacklist(refresh):
+                raise InvalidToken("Token is blacklisted")
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+class LazyCustomer(SimpleLazyObject):
+    # request.user for token authenticated requests: the id and the token
+    # claims are available right away, the Customer row is only loaded once
+    # any other attribute is accessed
+
+    def __init__(self, customer_id, claims):
+        super().__init__(lambda: get_user(customer_id))
+        self.__dict__["_customer_id"] = customer_id
+        self.__dict__["_claims"] = claims
+
+    def __bool__(self):
+        return True
+
+    @property
+    def id(self):
+        return self._customer_id
+
+    pk = id
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    @property
+    def is_staff(self):
+        if "is_staff" in self._claims:
+            return self._claims["is_staff"]
+        return self.__getattr__("is_staff")
+
+
+class LazyJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            customer_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        if validated_token.get("is_active") is False:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        return LazyCustomer(customer_id, validated_token.payload)
+
+
+def get_user(customer_id):
+    now = time.monotonic()
+    with _users_lock:
+        cached = _users.get(customer_id)
+        if cached is not None and cached[0] > now:
+            _users.move_to_end(customer_id)
+            # a copy, so that changes made by one request stay in that request
+            return copy.copy(cached[1])
+
+    try:
+        customer = Customer.objects.get(**{api_settings.USER_ID_FIELD: customer_id})
+    except Customer.DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+
+    if not customer.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+    with _users_lock:
+        _users[customer_id] = (now + settings.AUTH_USER_CACHE_TTL, customer)
+        _users.move_to_end(customer_id)
+        while len(_users) > settings.AUTH_USER_CACHE_SIZE:
+            _users.popitem(last=False)
+
+    return copy.copy(customer)
+
+
+def forget_user(customer_id):
+    with _users_lock:
+        _users.pop(customer_id, None)
+
+
+def blacklist(token):
+    # False when the token was already blacklisted
+    expires_at = datetime.datetime.fromtimestamp(token["exp"], tz=datetime.timezone.utc)
+    try:
+        with transaction.atomic():
+            BlacklistedToken.objects.create(
+                jti=token[api_settings.JTI_CLAIM], expires_at=expires_at
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def is_blacklisted(token):
+    return BlacklistedToken.objects.filter(jti=token[api_settings.JTI_CLAIM]).exists()
+
+
+def prune_blacklist():
+    deleted, _ = BlacklistedToken.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,83 @@
+import re
+
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip is offered without it
+    brotli = None
+
+
+_accepts_brotli = re.compile(r"\bbr\b").search
+
+# bodies smaller than this are not worth compressing, same as GZipMiddleware
+MIN_SIZE = 200
+
+# pictures are already compressed, and wrapping a FileResponse would stop
+# the server from sending it with sendfile and break range requests
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    # brotli for API responses to clients that accept it (and when the
+    # package is installed), gzip through Django's GZipMiddleware for
+    # everything else. HTML pages carry CSRF tokens and keep going through
+    # GZipMiddleware for its BREACH mitigation
+    def process_response(self, request, response):
+        if not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        if (
+            brotli is None
+            or not response.get("Content-Type", "").startswith("application/json")
+            or not _accepts_brotli(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return super().process_response(request, response)
+
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _compress_async(response.streaming_content)
+            else:
+                response.streaming_content = _compress(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            compressed = brotli.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # the compressed body is a different representation of the same
+        # content, see GZipMiddleware
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+
+        return response
+
+
+def _compress(chunks):
+    compressor = brotli.Compressor()
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _compress_async(chunks):
+    compressor = brotli.Compressor()
+    async for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
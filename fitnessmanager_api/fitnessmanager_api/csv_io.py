@@ -0,0 +1,269 @@
+import csv
+import io
+import itertools
+import re
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.translation import override
+
+from . import customer_cache
+from .membership import refresh_all_memberships
+from .models import Customer, MonthlyRevenue, Payment
+from .sync import record_changes
+from .translated_keys import get_translated_key
+
+
+EXPORT_FIELDS = {
+    Customer: [
+        "id",
+        "first_name",
+        "last_name",
+        "email",
+        "phone_number",
+        "address",
+        "date_of_birth",
+        "passport_number",
+        "registration_date",
+        "membership_start_date",
+        "membership_end_date",
+        "active_membership",
+        "weight",
+        "height",
+        "notes",
+    ],
+    Payment: [
+        "id",
+        "customer",
+        "date",
+        "amount",
+        "discount_percent",
+        "payment_method",
+        "paid_month",
+        "paid_year",
+    ],
+}
+
+# rows fetched per round trip (a server-side cursor on PostgreSQL) on export
+# and rows inserted per statement on import
+CHUNK_SIZE = 2000
+
+
+class InvalidRow(ValueError):
+    # the first row import_csv could not import; nothing has been imported
+    def __init__(self, row, message):
+        location = f"Row {row}" if row is not None else "A row"
+        super().__init__(f"{location}: {message}")
+
+
+class _Echo:
+    # csv.writer only needs write(); returning the line lets the caller
+    # yield each row as soon as it is formatted
+    def write(self, value):
+        return value
+
+
+def filter_period(queryset, year=None, month=None):
+    # payments of the given paid_year/paid_month, or the customers who made one
+    period = {}
+    if year is not None:
+        period["paid_year"] = year
+    if month is not None:
+        period["paid_month"] = month
+
+    if not period:
+        return queryset
+    if queryset.model is Payment:
+        return queryset.filter(**period)
+    return queryset.filter(Exists(Payment.objects.filter(customer=OuterRef("pk"), **period)))
+
+
+def get_headers(model, language):
+    # verbose names are lazy; iter_csv runs after the view has returned
+    with override(language):
+        return [
+            get_translated_key(field_name, language, model=model)
+            for field_name in EXPORT_FIELDS[model]
+        ]
+
+
+def iter_csv(queryset, language):
+    model = queryset.model
+    attnames = [model._meta.get_field(name).attname for name in EXPORT_FIELDS[model]]
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow(get_headers(model, language))
+    rows = queryset.order_by("pk").values_list(*attnames).iterator(chunk_size=CHUNK_SIZE)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def import_csv(model, lines, language):
+    # lines: an iterable of CSV text lines with a header row, as written by
+    # iter_csv in the same language
+    header_to_field = dict(zip(get_headers(model, language), EXPORT_FIELDS[model]))
+
+    reader = csv.reader(lines)
+    try:
+        header = next(reader)
+    except StopIteration:
+        return 0
+    unknown = [column for column in header if column not in header_to_field]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    fields = [model._meta.get_field(header_to_field[column]) for column in header]
+
+    began = timezone.now()
+    with transaction.atomic():
+        # Customer cannot go through COPY: password, is_staff and friends
+        # have no database default, so every row has to be built in Python
+        if model is Payment and connection.vendor == "postgresql":
+            imported = _copy_from(model, fields, reader)
+        else:
+            imported = _bulk_create(model, fields, reader)
+
+        if connection.vendor == "postgresql":
+            # imported rows may carry explicit ids
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                    cursor.execute(sql)
+
+        # neither path sends post_save; the imported rows are the ones
+        # stamped since the import began
+        imported_ids = model.objects.filter(updated_at__gte=began).values_list("pk", flat=True)
+        record_changes(model, imported_ids)
+
+        if model is Payment:
+            refresh_all_memberships()
+            MonthlyRevenue.objects.all().delete()
+        transaction.on_commit(customer_cache.invalidate_all)
+
+    return imported
+
+
+def _copy_from(model, fields, reader):
+    # the rows are re-serialized so COPY sees a clean CSV stream without the
+    # header; empty values become NULL. updated_at has no database default
+    # and is filled in here, like auto_now would
+    updated_at = model._meta.get_field("updated_at")
+    buffer = _CsvRowStream(reader, fields, extra=[timezone.now().isoformat()])
+    columns = ", ".join(
+        connection.ops.quote_name(field.column) for field in [*fields, updated_at]
+    )
+    sql = f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    try:
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(sql, buffer)
+    except IntegrityError as exc:
+        # the error context names the line of the COPY stream, which has no
+        # header: line n is row n
+        line = re.search(r"COPY \S+, line (\d+)", str(exc))
+        raise InvalidRow(int(line[1]) if line else None, _first_line(exc)) from exc
+    return buffer.rows
+
+
+def _bulk_create(model, fields, reader):
+    # auto_now_add would replace the dates of the file on insert
+    dated_fields = [field for field in fields if getattr(field, "auto_now_add", False)]
+    imported = 0
+    while True:
+        chunk = list(itertools.islice(reader, CHUNK_SIZE))
+        if not chunk:
+            return imported
+
+        objects = []
+        for row_number, row in enumerate(chunk, imported + 1):
+            obj = model(**_clean_row(fields, row, row_number))
+            if model is Customer:
+                obj.set_unusable_password()
+            objects.append(obj)
+        dates = [[getattr(obj, field.attname) for field in dated_fields] for obj in objects]
+
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(objects, batch_size=CHUNK_SIZE)
+        except IntegrityError:
+            _raise_first_conflict(model, objects, imported + 1)
+
+        if dated_fields:
+            restored = []
+            for obj, values in zip(objects, dates):
+                given = [(field, value) for field, value in zip(dated_fields, values) if value]
+                for field, value in given:
+                    setattr(obj, field.attname, value)
+                if given:
+                    restored.append(obj)
+            model.objects.bulk_update(
+                restored, [field.attname for field in dated_fields], batch_size=CHUNK_SIZE
+            )
+        imported += len(objects)
+
+
+def _clean_row(fields, row, row_number):
+    # {attname: value} of a CSV row, validated like a model form would,
+    # except for the foreign keys, which the database checks
+    values = {}
+    for field, value in zip(fields, row):
+        if value == "":
+            values[field.attname] = None
+            continue
+        try:
+            value = field.to_python(value)
+            if not field.is_relation:
+                field.validate(value, None)
+            field.run_validators(value)
+        except ValidationError as exc:
+            raise InvalidRow(row_number, f"{field.name}: {' '.join(exc.messages)}") from exc
+        values[field.attname] = value
+    return values
+
+
+def _raise_first_conflict(model, objects, first_row_number):
+    # inserts the rows of the failed chunk one by one to find the row the
+    # database rejects; the import is rolled back by the caller either way
+    for row_number, obj in enumerate(objects, first_row_number):
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([obj])
+        except IntegrityError as exc:
+            raise InvalidRow(row_number, _first_line(exc)) from exc
+    raise InvalidRow(None, "Conflicting rows")
+
+
+def _first_line(exc):
+    return str(exc).strip().splitlines()[0]
+
+
+class _CsvRowStream(io.TextIOBase):
+    # file-like object copy_expert reads from, filled one chunk at a time;
+    # the rows are validated on the way
+    def __init__(self, reader, fields, extra=()):
+        self.reader = reader
+        self.fields = fields
+        self.extra = list(extra)
+        self.rows = 0
+        self.pending = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.pending) < size:
+            chunk = list(itertools.islice(self.reader, CHUNK_SIZE))
+            if not chunk:
+                break
+            for row_number, row in enumerate(chunk, self.rows + 1):
+                _clean_row(self.fields, row, row_number)
+            output = io.StringIO()
+            csv.writer(output).writerows(row + self.extra for row in chunk)
+            self.pending += output.getvalue()
+            self.rows += len(chunk)
+
+        if size < 0:
+            data, self.pending = self.pending, ""
+        else:
+            data, self.pending = self.pending[:size], self.pending[size:]
+        return data
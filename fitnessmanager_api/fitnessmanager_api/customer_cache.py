@@ -0,0 +1,111 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Serialized CustomerData rows are cached per (customer id, language,
+# all_fields). Two counters are kept in a cache of their own, where the rows
+# cannot cull them (a counter that starts over at 1 would repeat old ETags
+# and bring back rows of an old generation):
+#
+# - the version is bumped on every change to a customer or payment and is
+#   what ETag/Last-Modified are derived from
+# - the generation is part of every row key and is only bumped to drop all
+#   rows at once, e.g. after a bulk membership refresh
+#
+# With the default local-memory backend every worker process has its own
+# copy; configure REDIS_URL to share rows and invalidations between workers.
+
+VERSION_KEY = "customer-data:version"
+MODIFIED_KEY = "customer-data:modified"
+GENERATION_KEY = "customer-data:generation"
+
+# cache misses are loaded in chunks to keep the id__in lists bounded
+LOAD_CHUNK_SIZE = 1000
+
+stats = {"hits": 0, "misses": 0}
+
+
+def get_cache():
+    return caches[settings.CUSTOMER_DATA_CACHE]
+
+
+def get_languages():
+    # English is the language of the source strings and not in LANGUAGES
+    return {"en"} | {code for code, _ in settings.LANGUAGES}
+
+
+def get_state_cache():
+    return caches[settings.CUSTOMER_DATA_STATE_CACHE]
+
+
+def get_state():
+    cache = get_state_cache()
+    state = cache.get_many([VERSION_KEY, MODIFIED_KEY, GENERATION_KEY])
+    if len(state) < 3:
+        cache.add(VERSION_KEY, 1, None)
+        cache.add(MODIFIED_KEY, time.time(), None)
+        cache.add(GENERATION_KEY, 1, None)
+        state = cache.get_many([VERSION_KEY, MODIFIED_KEY, GENERATION_KEY])
+    return state[VERSION_KEY], state[MODIFIED_KEY], state[GENERATION_KEY]
+
+
+def get_etag(version, params):
+    identity = f"{version}:{sorted(params.items())}"
+    return '"%s"' % hashlib.sha1(identity.encode()).hexdigest()
+
+
+def get_rows(ids, language, all_fields, generation, load_rows):
+    # load_rows(missing_ids) -> {id: serialized row} for the cache misses
+    cache = get_cache()
+    keys = {_get_row_key(generation, pk, language, all_fields): pk for pk in ids}
+    cached = cache.get_many(keys)
+
+    rows = {keys[key]: row for key, row in cached.items()}
+    missing = [pk for pk in ids if pk not in rows]
+    stats["hits"] += len(rows)
+    stats["misses"] += len(missing)
+
+    for start in range(0, len(missing), LOAD_CHUNK_SIZE):
+        loaded = load_rows(missing[start : start + LOAD_CHUNK_SIZE])
+        cache.set_many(
+            {
+                _get_row_key(generation, pk, language, all_fields): row
+                for pk, row in loaded.items()
+            },
+            settings.CUSTOMER_DATA_CACHE_TIMEOUT,
+        )
+        rows.update(loaded)
+
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+def invalidate_customer(customer_id):
+    cache = get_cache()
+    _, _, generation = get_state()
+    cache.delete_many(
+        [
+            _get_row_key(generation, customer_id, language, all_fields)
+            for language in get_languages()
+            for all_fields in (False, True)
+        ]
+    )
+    _bump(VERSION_KEY)
+
+
+def invalidate_all():
+    _bump(GENERATION_KEY)
+    _bump(VERSION_KEY)
+
+
+def _bump(key):
+    cache = get_state_cache()
+    cache.add(key, 1, None)
+    cache.incr(key)
+    cache.set(MODIFIED_KEY, time.time(), None)
+
+
+def _get_row_key(generation, customer_id, language, all_fields):
+    return f"customer-data:{generation}:{customer_id}:{language}:{int(all_fields)}"
@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+
+from . import imaging, picture_cache
+
+
+logger = logging.getLogger(__name__)
+
+# every transform generated eagerly on upload, matching the query parameters
+# the mobile app sends (original or thumbnail size, each shape, PNG and WebP)
+VARIANTS = [
+    imaging.Transform(size, shape, image_format, imaging.DEFAULT_QUALITY.get(image_format))
+    for size in (None, imaging.THUMBNAIL_SIZE)
+    for shape in imaging.SHAPES
+    for image_format in ("png", "webp")
+]
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = None
+
+
+def get_variant_files(source_path):
+    # the pinned file names of the variants of a picture
+    return {
+        picture_cache.get_file_name(
+            picture_cache.get_cache_key(source_path, transform), transform.image_format
+        )
+        for transform in VARIANTS
+    }
+
+
+def get_missing_variants(source_path):
+    missing = []
+    for transform in VARIANTS:
+        key = picture_cache.get_cache_key(source_path, transform)
+        if not picture_cache.is_pinned(key, transform.image_format):
+            missing.append(transform)
+    return missing
+
+
+def generate_variants(source_path, variants=None):
+    if variants is None:
+        variants = get_missing_variants(source_path)
+
+    for transform in variants:
+        key = picture_cache.get_cache_key(source_path, transform)
+        data = imaging.render_picture(source_path, transform)
+        picture_cache.put(key, data, transform.image_format, pinned=True)
+
+    return len(variants)
+
+
+def schedule_variants(source_path):
+    variants = get_missing_variants(source_path)
+    if not variants:
+        return
+
+    # without workers the pipeline degrades to a synchronous local queue
+    if settings.PROFILE_PICTURE_WORKERS == 0:
+        generate_variants(source_path, variants)
+        return
+
+    executor, pending = _get_executor()
+    if not pending.acquire(blocking=False):
+        # the pool is saturated; the variants are rendered lazily on first
+        # request or by the reconcile_profile_pictures command instead
+        logger.warning("Derivative queue is full, skipping %s", source_path)
+        return
+
+    future = executor.submit(generate_variants, source_path, variants)
+    future.add_done_callback(lambda f: _on_variants_done(f, source_path, pending))
+
+
+def _on_variants_done(future, source_path, pending):
+    pending.release()
+    if future.exception() is not None:
+        logger.error(
+            "Generating variants for %s failed",
+            source_path,
+            exc_info=future.exception(),
+        )
+
+
+def _get_executor():
+    global _executor, _pending
+
+    with _executor_lock:
+        if _executor is None:
+            # forking a threaded gthread/uvicorn worker could copy locks held
+            # by its other threads into the child; the forkserver forks from
+            # a clean single threaded process instead
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PROFILE_PICTURE_WORKERS,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_worker,
+            )
+            _pending = threading.BoundedSemaphore(settings.PROFILE_PICTURE_MAX_PENDING)
+        return _executor, _pending
+
+
+def _init_worker():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fitnessmanager_api.settings")
+    django.setup()
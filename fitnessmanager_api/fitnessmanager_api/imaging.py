@@ -0,0 +1,165 @@
+import functools
+import io
+import os
+from collections import namedtuple
+
+
+# PIL is imported by the functions that render, so that loading this module
+# for its constants (admin, derivatives, the URLconf) stays cheap
+
+THUMBNAIL_SIZE = (128, 128)
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+
+DEFAULT_QUALITY = {
+    "webp": 80,
+    "jpeg": 85,
+}
+
+SHAPES = ("original", "round", "oval")
+
+# masks up to this width and height are cached, at most 64 KiB each
+MASK_CACHE_MAX_SIDE = 256
+
+# extensions of uploads that can be sent as they are, see is_unmodified
+SOURCE_FORMATS = {
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".png": "png",
+    ".webp": "webp",
+}
+
+# size is the (width, height) box the picture is scaled down to fit in, or
+# None to keep the original resolution; quality is None for lossless formats
+Transform = namedtuple("Transform", "size shape image_format quality")
+
+
+def parse_transform(params):
+    shape = params.get("shape", "original")
+    if shape not in SHAPES:
+        raise ValueError("Unsupported shape")
+
+    image_format = params.get("format", "png").lower()
+    image_format = "jpeg" if image_format == "jpg" else image_format
+    if image_format not in CONTENT_TYPES:
+        raise ValueError("Unsupported image format")
+
+    size = params.get("size")
+    if size:
+        width, _, height = size.lower().partition("x")
+        size = (int(width), int(height or width))
+        if min(size) < 1:
+            raise ValueError("Invalid size")
+    elif params.get("as_thumbnail", "false").lower() == "true":
+        size = THUMBNAIL_SIZE
+    else:
+        size = None
+
+    quality = None
+    if image_format in DEFAULT_QUALITY:
+        quality = int(params.get("quality", DEFAULT_QUALITY[image_format]))
+        if not 1 <= quality <= 100:
+            raise ValueError("Invalid quality")
+
+    return Transform(size, shape, image_format, quality)
+
+
+def is_unmodified(source_path, transform):
+    # rendering would only decode and re-encode the upload in its own format
+    extension = os.path.splitext(source_path)[1].lower()
+    return (
+        transform.size is None
+        and transform.shape == "original"
+        and SOURCE_FORMATS.get(extension) == transform.image_format
+        and transform.quality == DEFAULT_QUALITY.get(transform.image_format)
+    )
+
+
+def render_picture(source_path, transform):
+    from PIL import Image
+
+    with Image.open(source_path) as img:
+        if transform.size is not None:
+            # lets the JPEG decoder scale by 1/2, 1/4 or 1/8 while decoding,
+            # so large uploads are never fully decompressed for a thumbnail
+            img.draft(img.mode, transform.size)
+            img.thumbnail(transform.size, reducing_gap=2.0)
+        else:
+            img.load()
+
+        if transform.shape == "oval":
+            img = make_oval_image(img)
+        elif transform.shape == "round":
+            img = make_round_image(img)
+
+        return encode(img, transform)
+
+
+def encode(img, transform):
+    from PIL import Image
+
+    options = {}
+    if transform.quality is not None:
+        options["quality"] = transform.quality
+
+    if transform.image_format == "jpeg" and img.mode != "RGB":
+        # JPEG has no alpha channel, flatten masked shapes onto white
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        if img.mode in ("RGBA", "LA"):
+            background.paste(img, mask=img.getchannel("A"))
+        else:
+            background.paste(img.convert("RGB"))
+        img = background
+
+    output = io.BytesIO()
+    img.save(output, transform.image_format.upper(), **options)
+    return output.getvalue()
+
+
+def make_oval_image(img):
+    # the mask covers the whole picture, so no crop or resize is needed
+    output = img.convert("RGBA") if img.mode != "RGBA" else img.copy()
+    output.putalpha(get_ellipse_mask(img.size))
+    return output
+
+
+def make_round_image(img):
+    from PIL import ImageOps
+
+    size = min(img.width, img.height)
+    output = ImageOps.fit(img, (size, size), centering=(0.5, 0.5))
+    output = output.convert("RGBA") if output.mode != "RGBA" else output
+    output.putalpha(get_ellipse_mask((size, size)))
+    return output
+
+
+def get_ellipse_mask(size):
+    # callers only read the mask, so a cached instance is shared between
+    # requests. The cache holds thumbnail-sized masks only: one mask per
+    # full-resolution picture would keep megabytes per upload in every worker
+    if max(size) <= MASK_CACHE_MAX_SIDE:
+        return _get_cached_ellipse_mask(size)
+    return _draw_ellipse_mask(size)
+
+
+@functools.lru_cache(maxsize=64)
+def _get_cached_ellipse_mask(size):
+    return _draw_ellipse_mask(size)
+
+
+def _draw_ellipse_mask(size):
+    # drawn oversampled and scaled down for an antialiased edge
+    from PIL import Image, ImageDraw
+
+    width, height = size
+    factor = 4 if max(size) <= 512 else 2 if max(size) <= 2048 else 1
+    mask = Image.new("L", (width * factor, height * factor), 0)
+    draw = ImageDraw.Draw(mask)
+    draw.ellipse((0, 0, width * factor - 1, height * factor - 1), fill=255)
+    if factor > 1:
+        mask = mask.resize(size, Image.Resampling.LANCZOS)
+    return mask
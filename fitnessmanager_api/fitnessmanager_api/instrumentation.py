@@ -0,0 +1,206 @@
+import contextlib
+import contextvars
+import hmac
+import random
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from . import customer_cache
+
+
+# Per-route histograms of sampled requests, kept in process memory. Each
+# worker process exposes its own numbers on /metrics; Prometheus adds them up
+# across the scraped targets.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+METRICS = {
+    "request_duration_seconds": ("Wall time of the request", DURATION_BUCKETS),
+    "db_queries": ("Database queries per request", QUERY_COUNT_BUCKETS),
+    "db_duration_seconds": ("Time spent in database queries", DURATION_BUCKETS),
+    "pil_duration_seconds": ("Time spent rendering pictures with PIL", DURATION_BUCKETS),
+    "response_size_bytes": ("Size of the response body", SIZE_BUCKETS),
+}
+
+_current = contextvars.ContextVar("request_timings", default=None)
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class InstrumentationMiddleware:
+    # runs in either mode, so that ASGI requests do not go through a thread
+    # just for this middleware
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timings = defaultdict(float)
+        token = _current.set(timings)
+        began = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return _record(request, response, timings, time.perf_counter() - began)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        # sync_to_async copies the context, so queries made in its threads
+        # are added to these timings as well
+        timings = defaultdict(float)
+        token = _current.set(timings)
+        began = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return _record(request, response, timings, time.perf_counter() - began)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # connections are per thread, and the queries of an ASGI request run in
+    # threads the middleware cannot reach, so every connection gets the timer
+    # and it looks up the request through the context
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    began = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings["db"] += time.perf_counter() - began
+        timings["db_queries"] += 1
+
+
+def _record(request, response, timings, duration):
+    route = _get_route(request)
+    _observe(route, "request_duration_seconds", duration)
+    _observe(route, "db_queries", timings["db_queries"])
+    _observe(route, "db_duration_seconds", timings["db"])
+    if "pil" in timings:
+        _observe(route, "pil_duration_seconds", timings["pil"])
+    size = _get_response_size(response)
+    if size is not None:
+        _observe(route, "response_size_bytes", size)
+
+    server_timing = [
+        f'db;dur={timings["db"] * 1000:.1f};desc="{int(timings["db_queries"])} queries"',
+        f"app;dur={duration * 1000:.1f}",
+    ]
+    if "pil" in timings:
+        server_timing.insert(1, f'pil;dur={timings["pil"] * 1000:.1f}')
+    response["Server-Timing"] = ", ".join(server_timing)
+    return response
+
+
+@contextlib.contextmanager
+def timer(name):
+    # adds the time spent in the block to the current request, if sampled
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] += time.perf_counter() - began
+
+
+def metrics(request):
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+            return HttpResponseForbidden()
+    elif not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    lines = []
+    with _histograms_lock:
+        for name, (description, _) in METRICS.items():
+            metric = f"fitnessmanager_{name}"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (route, histogram_name), histogram in sorted(_histograms.items()):
+                if histogram_name != name:
+                    continue
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'{metric}_bucket{{route="{route}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{route="{route}",le="+Inf"}} {histogram.total}')
+                lines.append(f'{metric}_sum{{route="{route}"}} {histogram.sum}')
+                lines.append(f'{metric}_count{{route="{route}"}} {histogram.total}')
+
+    for name, value in customer_cache.stats.items():
+        metric = f"fitnessmanager_customer_data_cache_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+
+    return HttpResponse("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4")
+
+
+def _observe(route, name, value):
+    with _histograms_lock:
+        histogram = _histograms.get((route, name))
+        if histogram is None:
+            histogram = _histograms[(route, name)] = _Histogram(METRICS[name][1])
+        histogram.observe(value)
+
+
+def _get_route(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.route.replace('"', "")
+
+
+def _get_response_size(response):
+    if response.has_header("Content-Length"):
+        return int(response["Content-Length"])
+    if not response.streaming:
+        return len(response.content)
+    return None
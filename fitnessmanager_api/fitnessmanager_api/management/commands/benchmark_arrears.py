@@ -0,0 +1,90 @@
+import random
+import time
+
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+
+from fitnessmanager_api.models import Customer, Payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the arrears query on a synthetic data set. The data is created "
+        "inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=50_000)
+        parser.add_argument("--payments", type=int, default=2_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._generate(options["customers"], options["payments"], options["batch_size"])
+            self._benchmark(options["repeat"])
+            transaction.set_rollback(True)
+
+    def _generate(self, customer_count, payment_count, batch_size):
+        start = time.perf_counter()
+        for offset in range(0, customer_count, batch_size):
+            Customer.objects.bulk_create(
+                Customer(
+                    email=f"arrears-benchmark-{i}@example.invalid",
+                    password="!",
+                    first_name=f"First {i}",
+                    last_name=f"Last {i}",
+                )
+                for i in range(offset, min(offset + batch_size, customer_count))
+            )
+        customer_ids = list(
+            Customer.objects.filter(
+                email__startswith="arrears-benchmark-"
+            ).values_list("id", flat=True)
+        )
+
+        # spread the payments over consecutive months starting in 2023 so the
+        # most recent months are only partially paid
+        months = max(payment_count // len(customer_ids), 1)
+        created = 0
+        while created < payment_count:
+            batch = []
+            for _ in range(min(batch_size, payment_count - created)):
+                period = random.randrange(months + 1)
+                batch.append(
+                    Payment(
+                        customer_id=random.choice(customer_ids),
+                        amount=30,
+                        paid_year=2023 + period // 12,
+                        paid_month=period % 12 + 1,
+                    )
+                )
+            Payment.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(
+            f"Generated {len(customer_ids)} customers and {created} payments "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        self.last_period = (2023 + months // 12, months % 12 + 1)
+
+    def _benchmark(self, repeat):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE fitnessmanager_api_payment")
+
+        for label, start in (
+            ("single month", self.last_period),
+            ("year", (self.last_period[0] - 1, self.last_period[1])),
+        ):
+            queryset = Customer.objects.in_arrears(start, self.last_period).order_by("id")
+            timings = []
+            for _ in range(repeat):
+                began = time.perf_counter()
+                count = queryset.count()
+                page = list(queryset.values("id")[:100])
+                timings.append(time.perf_counter() - began)
+            self.stdout.write(
+                f"{label}: {count} customers in arrears, best of {repeat} "
+                f"{min(timings) * 1000:.1f} ms (count + first page of {len(page)})"
+            )
@@ -0,0 +1,116 @@
+import io
+import multiprocessing
+import os
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageOps
+
+from fitnessmanager_api import imaging
+
+
+class Command(BaseCommand):
+    help = "Compare per-request time and peak memory of the picture transforms"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source",
+            nargs="?",
+            default=os.path.join(settings.BASE_DIR, "customer_profile_pictures"),
+            help="Picture or directory of pictures to render",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        if os.path.isdir(source):
+            sources = [os.path.join(source, name) for name in sorted(os.listdir(source))]
+        else:
+            sources = [source]
+
+        # every measurement runs in a fresh process, so that the memory of
+        # one path is not reused by the next
+        context = multiprocessing.get_context("spawn")
+        for as_thumbnail in (False, True):
+            for shape in imaging.SHAPES:
+                label = f"{shape}{' thumbnail' if as_thumbnail else ''}"
+                for name, target in (("current", _render_current), ("legacy", _render_legacy)):
+                    with context.Pool(1) as pool:
+                        elapsed, traced_peak, resident_growth = pool.apply(
+                            _measure, (target, sources, as_thumbnail, shape, options["repeat"])
+                        )
+                    resident = "n/a"
+                    if resident_growth is not None:
+                        resident = f"{resident_growth / 2**20:.1f} MiB"
+                    self.stdout.write(
+                        f"{label:<20} {name:<8} {elapsed * 1000:8.2f} ms/request "
+                        f"{traced_peak / 2**20:8.2f} MiB traced peak "
+                        f"{resident:>10} peak resident growth"
+                    )
+
+
+def _measure(target, sources, as_thumbnail, shape, repeat):
+    # peak memory of rendering every source once. tracemalloc sees the
+    # Python objects, such as the encoded pictures, but not the pixel
+    # buffers Pillow allocates in C; those show in the resident size, whose
+    # high-water mark Linux resets on request
+    resident_growth = None
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        baseline_kb = _read_status_kb("VmRSS")
+    except OSError:
+        baseline_kb = None
+
+    tracemalloc.start()
+    for source_path in sources:
+        target(source_path, as_thumbnail, shape)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if baseline_kb is not None:
+        resident_growth = (_read_status_kb("VmHWM") - baseline_kb) * 1024
+
+    # timed without tracemalloc, which slows down every allocation
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for source_path in sources:
+            target(source_path, as_thumbnail, shape)
+    elapsed = (time.perf_counter() - start) / (repeat * len(sources))
+    return elapsed, traced_peak, resident_growth
+
+
+def _read_status_kb(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise OSError(f"{field} not in /proc/self/status")
+
+
+def _render_current(source_path, as_thumbnail, shape):
+    size = imaging.THUMBNAIL_SIZE if as_thumbnail else None
+    return imaging.render_picture(source_path, imaging.Transform(size, shape, "png", None))
+
+
+def _render_legacy(source_path, as_thumbnail, shape):
+    # the rendering GetProfilePicture did before the transform engine
+    img = Image.open(source_path)
+    if as_thumbnail:
+        img.thumbnail((128, 128))
+
+    if shape in ("oval", "round"):
+        if shape == "oval":
+            size = (img.width, img.height)
+        else:
+            size = (min(img.width, img.height),) * 2
+        mask = Image.new("L", size, 0)
+        draw = ImageDraw.Draw(mask)
+        draw.ellipse((0, 0) + size, fill=255)
+        img = ImageOps.fit(img, mask.size, centering=(0.5, 0.5))
+        img.putalpha(mask)
+
+    output = io.BytesIO()
+    img.save(output, "PNG")
+    return output.getvalue()
@@ -0,0 +1,84 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from fitnessmanager_api.models import Customer, MonthlyRevenue, Payment
+from fitnessmanager_api.reports import get_revenue_report
+
+
+PAYMENT_METHODS = ["cash", "card", "transfer", None]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the revenue report on a synthetic payment history that grows year "
+        "by year. The data is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=5_000)
+        parser.add_argument("--years", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            customer_ids = self._generate_customers(options["customers"], options["batch_size"])
+            today = timezone.localdate()
+            current = (today.year, today.month)
+
+            # payments are added oldest year first, so every step reports on a
+            # longer history
+            for years_back in range(options["years"] - 1, -1, -1):
+                payment_count = self._generate_year(
+                    customer_ids, today.year - years_back, options["batch_size"]
+                )
+                start = (today.year - options["years"] + 1, 1)
+
+                MonthlyRevenue.objects.all().delete()
+                began = time.perf_counter()
+                get_revenue_report(start, current)
+                cold = time.perf_counter() - began
+
+                began = time.perf_counter()
+                get_revenue_report(start, current)
+                warm = time.perf_counter() - began
+
+                self.stdout.write(
+                    f"{today.year - years_back}: +{payment_count} payments, "
+                    f"cold {cold * 1000:.1f} ms, warm {warm * 1000:.1f} ms"
+                )
+
+            transaction.set_rollback(True)
+
+    def _generate_customers(self, customer_count, batch_size):
+        for offset in range(0, customer_count, batch_size):
+            Customer.objects.bulk_create(
+                Customer(email=f"revenue-benchmark-{i}@example.invalid", password="!")
+                for i in range(offset, min(offset + batch_size, customer_count))
+            )
+        return list(
+            Customer.objects.filter(
+                email__startswith="revenue-benchmark-"
+            ).values_list("id", flat=True)
+        )
+
+    def _generate_year(self, customer_ids, year, batch_size):
+        payments = [
+            Payment(
+                customer_id=customer_id,
+                amount=Decimal(random.choice(["30.00", "35.00", "40.00"])),
+                discount_percent=random.choice([None, Decimal("10.00"), Decimal("20.00")]),
+                payment_method=random.choice(PAYMENT_METHODS),
+                paid_year=year,
+                paid_month=month,
+            )
+            for month in range(1, 13)
+            for customer_id in customer_ids
+            if random.random() < 0.8
+        ]
+        Payment.objects.bulk_create(payments, batch_size=batch_size)
+        return len(payments)
@@ -0,0 +1,126 @@
+import cProfile
+import datetime
+import json
+import pstats
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from fitnessmanager_api.models import Customer
+from fitnessmanager_api.translated_keys import get_translated_key
+from fitnessmanager_api.views import (
+    _get_fields_to_return,
+    _get_plan_fields,
+    _get_serialization_plan,
+    _get_value_and_type,
+    _is_key_editable,
+    _serialize_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare the column-oriented serialization with the per-cell helpers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+        parser.add_argument("--lang", default="es")
+        parser.add_argument("--all", action="store_true", dest="all_fields")
+        parser.add_argument(
+            "--profile", action="store_true", help="print the top functions of both runs"
+        )
+
+    def handle(self, *args, **options):
+        language = options["lang"]
+        all_fields = options["all_fields"]
+
+        for row_count in options["rows"]:
+            rows = _make_rows(row_count)
+
+            legacy, legacy_time = self._run(
+                options["profile"],
+                lambda: [_legacy_translate_row(row, all_fields, language) for row in rows],
+            )
+
+            def serialize_columns():
+                plan = _get_serialization_plan(language, all_fields)
+                fields = _get_plan_fields(plan)
+                values = [tuple(row[field] for field in fields) for row in rows]
+                return _serialize_rows(values, plan)
+
+            columnar, columnar_time = self._run(options["profile"], serialize_columns)
+
+            # the payload has to stay byte-identical, not just equal
+            if _dumps(legacy) != _dumps(columnar):
+                self.stderr.write("Column-oriented output differs from the helpers")
+
+            self.stdout.write(
+                f"{row_count} rows: helpers {legacy_time:.3f}s, "
+                f"columns {columnar_time:.3f}s ({legacy_time / columnar_time:.1f}x)"
+            )
+
+    def _run(self, profile, func):
+        profiler = cProfile.Profile() if profile else None
+        start = time.perf_counter()
+        if profiler:
+            result = profiler.runcall(func)
+        else:
+            result = func()
+        elapsed = time.perf_counter() - start
+
+        if profiler:
+            stats = pstats.Stats(profiler, stream=self.stdout)
+            stats.sort_stats("cumulative").print_stats(15)
+        return result, elapsed
+
+
+def _dumps(rows):
+    return json.dumps(rows, cls=DjangoJSONEncoder)
+
+
+def _legacy_translate_row(data, all_fields, language):
+    translated_data = {}
+    for field_name in _get_fields_to_return(all_fields):
+        if field_name not in data:
+            continue
+
+        key = get_translated_key(field_name, language)
+        value, value_type = _get_value_and_type(data[field_name], language)
+
+        translated_data[key] = {
+            "value": value if value else " - ",
+            "_type": value_type,
+            "editable": _is_key_editable(field_name),
+        }
+
+    return translated_data
+
+
+def _make_rows(row_count):
+    now = datetime.datetime(2023, 5, 7, 12, 0, tzinfo=datetime.timezone.utc)
+    sample = {}
+    for field in Customer._meta.concrete_fields:
+        internal_type = field.get_internal_type()
+        if internal_type == "BooleanField":
+            sample[field.attname] = True
+        elif internal_type == "DateField":
+            sample[field.attname] = now.date()
+        elif internal_type == "DateTimeField":
+            sample[field.attname] = now
+        elif internal_type == "DecimalField":
+            sample[field.attname] = Decimal("72.50")
+        elif internal_type in ("BigAutoField", "AutoField"):
+            sample[field.attname] = 0
+        else:
+            sample[field.attname] = field.name
+
+    rows = []
+    for i in range(row_count):
+        row = dict(sample)
+        row["id"] = i + 1
+        if i % 3 == 0:
+            row["membership_start_date"] = None
+            row["notes"] = None
+        rows.append(row)
+    return rows
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from fitnessmanager_api.csv_io import filter_period, iter_csv
+from fitnessmanager_api.models import Customer, Payment
+
+
+MODELS = {"customers": Customer, "payments": Payment}
+
+
+class Command(BaseCommand):
+    help = "Stream customers or payments as CSV, optionally for one paid year/month"
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(MODELS))
+        parser.add_argument("--year", type=int)
+        parser.add_argument("--month", type=int)
+        parser.add_argument("--lang", default="en", help="Language of the header row")
+        parser.add_argument("--output", help="File to write to instead of stdout")
+
+    def handle(self, *args, **options):
+        queryset = filter_period(
+            MODELS[options["model"]].objects.all(), options["year"], options["month"]
+        )
+
+        output = open(options["output"], "w", newline="") if options["output"] else sys.stdout
+        try:
+            for line in iter_csv(queryset, options["lang"]):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,152 @@
+import datetime
+import io
+import random
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from fitnessmanager_api import customer_cache
+from fitnessmanager_api.membership import refresh_all_memberships
+from fitnessmanager_api.models import Customer, MonthlyRevenue, Payment
+
+
+# generated customers are recognised by this e-mail domain
+EMAIL_DOMAIN = "generated.invalid"
+
+FIRST_NAMES = [
+    "Lucía", "Martín", "Sofía", "Hugo", "María", "Pablo", "Valentina", "Álvaro",
+    "Carmen", "Javier", "Emma", "Oliver", "Grace", "Jack", "Olga", "Pavlo",
+]
+LAST_NAMES = [
+    "García", "Fernández", "González", "Rodríguez", "López", "Martínez", "Sánchez",
+    "Pérez", "Smith", "Johnson", "Brown", "Müller", "Kowalski", "Lysytsya",
+]
+NOTES = [
+    "Prefiere entrenar por la mañana",
+    "Lesión de rodilla, evitar sentadillas profundas",
+    "Wants a personal training plan",
+    "Pays for the family membership",
+    "",
+    None,
+]
+PAYMENT_METHODS = ["efectivo", "tarjeta", "transferencia", "cash", "card", None]
+
+
+class Command(BaseCommand):
+    help = "Generate realistic customers, profile pictures and multi-year payment histories"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=1_000)
+        parser.add_argument("--years", type=int, default=3)
+        parser.add_argument(
+            "--pictures", type=int, default=20, help="Distinct pictures shared by the customers"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete previously generated customers first"
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        if options["clear"]:
+            deleted, _ = Customer.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+            self.stdout.write(f"Deleted {deleted} generated rows")
+
+        pictures = [_save_picture(rng, i) for i in range(options["pictures"])]
+        customer_ids = self._generate_customers(rng, options["customers"], pictures, options["batch_size"])
+        payment_count = self._generate_payments(rng, customer_ids, options["years"], options["batch_size"])
+
+        refresh_all_memberships()
+        MonthlyRevenue.objects.all().delete()
+        customer_cache.invalidate_all()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(customer_ids)} customers, {len(pictures)} pictures "
+                f"and {payment_count} payments"
+            )
+        )
+
+    def _generate_customers(self, rng, customer_count, pictures, batch_size):
+        offset = Customer.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").count()
+        customers = []
+        for i in range(offset, offset + customer_count):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            customers.append(
+                Customer(
+                    email=f"member-{i}@{EMAIL_DOMAIN}",
+                    password="!",
+                    first_name=first_name,
+                    last_name=last_name,
+                    date_of_birth=datetime.date(rng.randint(1950, 2008), rng.randint(1, 12), rng.randint(1, 28)),
+                    address=f"Calle {rng.choice(LAST_NAMES)} {rng.randint(1, 200)}",
+                    phone_number=f"+34 6{rng.randint(10_000_000, 99_999_999)}",
+                    passport_number=f"{rng.randint(10_000_000, 99_999_999)}{rng.choice('TRWAGMYFPDXBNJZSQVHLCKE')}",
+                    notes=rng.choice(NOTES),
+                    weight=Decimal(rng.randint(4500, 11000)) / 100,
+                    height=Decimal(rng.randint(150, 200)),
+                    profile_picture=rng.choice(pictures) if pictures and rng.random() < 0.8 else None,
+                )
+            )
+        Customer.objects.bulk_create(customers, batch_size=batch_size)
+        return list(
+            Customer.objects.filter(
+                email__in=[customer.email for customer in customers]
+            ).values_list("id", flat=True)
+        )
+
+    def _generate_payments(self, rng, customer_ids, years, batch_size):
+        today = timezone.localdate()
+        current_period = today.year * 12 + today.month - 1
+        payment_count = 0
+        batch = []
+        for customer_id in customer_ids:
+            # each customer joins at some point and may stop paying later
+            first_period = current_period - rng.randint(0, years * 12 - 1)
+            last_period = current_period if rng.random() < 0.7 else rng.randint(first_period, current_period)
+            method = rng.choice(PAYMENT_METHODS)
+            for period in range(first_period, last_period + 1):
+                if rng.random() < 0.05:
+                    continue
+                year, month = period // 12, period % 12 + 1
+                batch.append(
+                    Payment(
+                        customer_id=customer_id,
+                        date=datetime.date(year, month, rng.randint(1, 10)),
+                        amount=Decimal(rng.choice(["30.00", "35.00", "40.00", "45.00"])),
+                        discount_percent=rng.choice([None, None, None, Decimal("10.00"), Decimal("25.00")]),
+                        payment_method=method,
+                        paid_month=month,
+                        paid_year=year,
+                    )
+                )
+                if len(batch) >= batch_size:
+                    Payment.objects.bulk_create(batch)
+                    payment_count += len(batch)
+                    batch = []
+        Payment.objects.bulk_create(batch)
+        return payment_count + len(batch)
+
+
+def _save_picture(rng, index):
+    width, height = rng.choice([(1280, 960), (960, 1280), (2048, 1536)])
+    img = Image.new("RGB", (width, height), tuple(rng.randint(0, 255) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(20):
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        radius = rng.randint(20, 300)
+        draw.ellipse(
+            (x - radius, y - radius, x + radius, y + radius),
+            fill=tuple(rng.randint(0, 255) for _ in range(3)),
+        )
+
+    output = io.BytesIO()
+    img.save(output, "JPEG", quality=85)
+    upload_to = Customer._meta.get_field("profile_picture").upload_to
+    return default_storage.save(f"{upload_to}/generated-{index}.jpg", ContentFile(output.getvalue()))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from fitnessmanager_api.csv_io import import_csv
+from fitnessmanager_api.models import Customer, Payment
+
+
+MODELS = {"customers": Customer, "payments": Payment}
+
+
+class Command(BaseCommand):
+    help = "Import customers or payments from a CSV file written by export_csv"
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(MODELS))
+        parser.add_argument("path")
+        parser.add_argument("--lang", default="en", help="Language of the header row")
+
+    def handle(self, *args, **options):
+        with open(options["path"], newline="") as csv_file:
+            try:
+                imported = import_csv(MODELS[options["model"]], csv_file, options["lang"])
+            except ValueError as exc:
+                # unknown columns, or the first row that could not be imported
+                # (InvalidRow); nothing has been imported
+                raise CommandError(exc)
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} {options['model']}"))
@@ -0,0 +1,87 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at a running server and report throughput and "
+        "latency, e.g. to compare SERVER_MODE=wsgi with SERVER_MODE=asgi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://localhost:8000")
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Path to request, may be repeated (default: customer data and picture)",
+        )
+        parser.add_argument("--method", default="GET")
+        parser.add_argument("--body", help="JSON request body")
+        parser.add_argument("--email", help="Customer to obtain a token for")
+        parser.add_argument("--password")
+        parser.add_argument("--token", help="Access token to use instead of --email")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        base_url = options["url"].rstrip("/")
+        token = options["token"] or self._obtain_token(base_url, options)
+        paths = options["path"] or [
+            "/customer-data/?limit=100",
+            "/api/profile_picture/?shape=round&as_thumbnail=true",
+        ]
+        body = options["body"].encode() if options["body"] else None
+
+        for path in paths:
+            def request(_):
+                req = urllib.request.Request(
+                    base_url + path,
+                    data=body,
+                    method=options["method"],
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Content-Type": "application/json",
+                    },
+                )
+                began = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(req) as response:
+                        response.read()
+                        status = response.status
+                except urllib.error.HTTPError as exc:
+                    status = exc.code
+                return status, time.perf_counter() - began
+
+            began = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                results = list(executor.map(request, range(options["requests"])))
+            elapsed = time.perf_counter() - began
+
+            latencies = sorted(latency for _, latency in results)
+            errors = sum(1 for status, _ in results if status >= 400)
+            self.stdout.write(
+                f"{path}: {len(results) / elapsed:.1f} req/s, "
+                f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, "
+                f"{errors} errors"
+            )
+
+    def _obtain_token(self, base_url, options):
+        if not options["email"]:
+            raise CommandError("Pass --token or --email/--password")
+
+        req = urllib.request.Request(
+            base_url + "/api/token/",
+            data=json.dumps(
+                {"email": options["email"], "password": options["password"]}
+            ).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req) as response:
+            return json.loads(response.read())["access"]
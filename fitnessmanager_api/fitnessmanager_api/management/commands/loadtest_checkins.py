@@ -0,0 +1,87 @@
+import json
+import random
+import statistics
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from fitnessmanager_api.management.commands import loadtest
+from fitnessmanager_api.models import Attendance, Customer
+
+
+class Command(loadtest.Command):
+    help = (
+        "Post check-ins for random customers with a current membership to a "
+        "running server, report throughput and latency and verify that every "
+        "accepted check-in was written"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://localhost:8000")
+        parser.add_argument("--email", help="Staff account to obtain a token for")
+        parser.add_argument("--password")
+        parser.add_argument("--token", help="Access token to use instead of --email")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--customers", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        base_url = options["url"].rstrip("/")
+        token = options["token"] or self._obtain_token(base_url, options)
+
+        today = timezone.localdate()
+        customer_ids = list(
+            Customer.objects.filter(
+                is_active=True,
+                membership_start_date__lte=today,
+                membership_end_date__gte=today,
+            ).values_list("pk", flat=True)[: options["customers"]]
+        )
+        if not customer_ids:
+            raise CommandError("No customer with a current membership, run generate_gym_data")
+
+        def check_in(_):
+            req = urllib.request.Request(
+                base_url + "/api/check-in/",
+                data=json.dumps({"customer": random.choice(customer_ids)}).encode(),
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": "application/json",
+                },
+            )
+            began = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as exc:
+                status = exc.code
+            return status, time.perf_counter() - began
+
+        started_at = timezone.now()
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(executor.map(check_in, range(options["requests"])))
+        elapsed = time.perf_counter() - began
+
+        latencies = sorted(latency for _, latency in results)
+        statuses = Counter(status for status, _ in results)
+        self.stdout.write(
+            f"{len(results) / elapsed:.1f} check-ins/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, "
+            f"statuses {dict(statuses)}"
+        )
+
+        # the server buffers check-ins, give every worker time to flush
+        time.sleep(settings.ATTENDANCE_FLUSH_INTERVAL + 1)
+        written = Attendance.objects.filter(checked_in_at__gte=started_at).count()
+        self.stdout.write(f"{written} of {statuses[201]} accepted check-ins written")
+        if written < statuses[201]:
+            raise CommandError("Some accepted check-ins were not written")
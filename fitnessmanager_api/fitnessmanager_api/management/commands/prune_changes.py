@@ -0,0 +1,16 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from fitnessmanager_api.models import Change
+
+
+class Command(BaseCommand):
+    help = "Delete the sync change log entries older than SYNC_CHANGE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=settings.SYNC_CHANGE_RETENTION_DAYS)
+        deleted, _ = Change.objects.filter(logged_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change log entries"))
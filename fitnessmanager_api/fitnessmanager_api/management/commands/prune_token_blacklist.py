@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from fitnessmanager_api.authentication import prune_blacklist
+
+
+class Command(BaseCommand):
+    help = "Delete the blacklisted refresh tokens that have expired"
+
+    def handle(self, *args, **options):
+        deleted = prune_blacklist()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} blacklisted tokens"))
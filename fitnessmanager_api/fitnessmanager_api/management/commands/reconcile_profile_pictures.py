@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from fitnessmanager_api import picture_cache
+from fitnessmanager_api.derivatives import (
+    generate_variants,
+    get_missing_variants,
+    get_variant_files,
+)
+from fitnessmanager_api.models import Customer
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the missing shape/size/format variants of uploaded profile pictures "
+        "and delete the variants of pictures that were replaced or removed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        upload_dir = default_storage.path(
+            Customer._meta.get_field("profile_picture").upload_to
+        )
+        if not os.path.isdir(upload_dir):
+            self.stdout.write(f"{upload_dir} does not exist, nothing to do")
+            return
+
+        # listed before the uploads, so that the variants of a picture uploaded
+        # meanwhile are not mistaken for orphans
+        pinned = picture_cache.get_pinned_files()
+
+        jobs = []
+        current = set()
+        for name in sorted(os.listdir(upload_dir)):
+            source_path = os.path.join(upload_dir, name)
+            if not os.path.isfile(source_path):
+                continue
+            current |= get_variant_files(source_path)
+            variants = get_missing_variants(source_path)
+            if variants:
+                jobs.append((source_path, variants))
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = [
+                (source_path, executor.submit(generate_variants, source_path, variants))
+                for source_path, variants in jobs
+            ]
+            generated = 0
+            for source_path, future in futures:
+                try:
+                    generated += future.result()
+                except Exception as exc:
+                    self.stderr.write(f"Skipping {source_path}: {exc}")
+
+        removed = 0
+        for name, path in pinned.items():
+            if name not in current:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {generated} variants for {len(jobs)} pictures, "
+                f"removed {removed} orphaned variants"
+            )
+        )
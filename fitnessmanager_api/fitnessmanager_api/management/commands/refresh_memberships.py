@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from fitnessmanager_api import customer_cache
+from fitnessmanager_api.membership import refresh_all_memberships
+
+
+class Command(BaseCommand):
+    help = "Recompute the membership status of every customer from their payments"
+
+    def handle(self, *args, **options):
+        updated = refresh_all_memberships()
+        if updated:
+            customer_cache.invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} customers"))
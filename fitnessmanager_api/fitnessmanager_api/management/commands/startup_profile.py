@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# code run in a fresh interpreter for each target
+TARGETS = {
+    # what every manage.py invocation and worker boot pays
+    "setup": "import django; django.setup()",
+    # plus the URLconf and the views, loaded by the first request
+    "urls": (
+        "import django; django.setup(); "
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the -X importtime breakdown of a cold start and fail when its "
+        "import time exceeds the budget"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=sorted(TARGETS), default="setup")
+        parser.add_argument(
+            "--budget-ms",
+            type=float,
+            help="defaults to STARTUP_BUDGET_MS for setup and STARTUP_URLS_BUDGET_MS for urls",
+        )
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--runs", type=int, default=3, help="the fastest run is reported")
+
+    def handle(self, *args, **options):
+        target = options["target"]
+        budget_ms = options["budget_ms"]
+        if budget_ms is None:
+            budget_ms = (
+                settings.STARTUP_BUDGET_MS if target == "setup" else settings.STARTUP_URLS_BUDGET_MS
+            )
+
+        imports, wall_ms = min(
+            (self._profile(TARGETS[target]) for _ in range(options["runs"])),
+            key=lambda run: _get_total_ms(run[0]),
+        )
+        total_ms = _get_total_ms(imports)
+
+        self.stdout.write(
+            f"Cold start ({target}): {total_ms:.1f} ms importing, "
+            f"{wall_ms:.1f} ms wall time, budget {budget_ms:.0f} ms"
+        )
+
+        by_package = defaultdict(float)
+        for _, self_us, _, name in imports:
+            by_package[name.split(".")[0]] += self_us / 1000
+        self.stdout.write("\nSlowest packages (own import time of all their modules):")
+        for package, package_ms in sorted(by_package.items(), key=lambda item: -item[1])[
+            : options["top"]
+        ]:
+            self.stdout.write(f"  {package_ms:8.1f} ms  {package}")
+
+        self.stdout.write("\nSlowest imports (including what they import):")
+        for depth, _, cumulative_us, name in sorted(imports, key=lambda item: -item[2])[
+            : options["top"]
+        ]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {'  ' * depth}{name}")
+
+        if total_ms > budget_ms:
+            raise CommandError(
+                f"Cold start imports take {total_ms:.1f} ms, over the budget of {budget_ms:.0f} ms"
+            )
+
+    def _profile(self, code):
+        began = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        wall_ms = (time.perf_counter() - began) * 1000
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return _parse_importtime(result.stderr), wall_ms
+
+
+def _parse_importtime(output):
+    # "import time:       self |  cumulative | <2 spaces per level>name"
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header
+        stripped = name[1:].lstrip(" ")
+        depth = (len(name) - 1 - len(stripped)) // 2
+        imports.append((depth, int(self_us), int(cumulative_us), stripped))
+    return imports
+
+
+def _get_total_ms(imports):
+    return sum(cumulative_us for depth, _, cumulative_us, _ in imports if depth == 0) / 1000
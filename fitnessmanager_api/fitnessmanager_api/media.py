@@ -0,0 +1,124 @@
+import os
+import re
+import urllib.parse
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+
+# MEDIA_SERVING decides who copies the bytes of a file once Django has
+# checked that the request may see it:
+#
+# - "django": a FileResponse, which gunicorn sends with os.sendfile through
+#   wsgi.file_wrapper; range requests are answered here
+# - "x-accel-redirect": nginx, from internal locations aliasing MEDIA_ROOT
+#   (MEDIA_ACCEL_PREFIX) and PROFILE_PICTURE_CACHE_DIR
+#   (PROFILE_PICTURE_CACHE_ACCEL_PREFIX)
+# - "x-sendfile": Apache mod_xsendfile or lighttpd, by absolute path
+#
+# Both proxies answer range requests themselves.
+
+_byte_range = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def send_file(request, path, content_type, etag=None):
+    if settings.MEDIA_SERVING == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = _get_accel_uri(path)
+    elif settings.MEDIA_SERVING == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+    else:
+        response = _get_file_response(request, path, content_type, etag)
+
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def get_file_etag(path):
+    # raises FileNotFoundError for missing files
+    stat = os.stat(path)
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _get_accel_uri(path):
+    locations = [
+        (settings.MEDIA_ROOT, settings.MEDIA_ACCEL_PREFIX),
+        (settings.PROFILE_PICTURE_CACHE_DIR, settings.PROFILE_PICTURE_CACHE_ACCEL_PREFIX),
+    ]
+    for root, prefix in locations:
+        relative = os.path.relpath(path, root)
+        if not relative.startswith(os.pardir):
+            return prefix.rstrip("/") + "/" + urllib.parse.quote(relative)
+    raise ValueError(f"{path} is outside of the served directories")
+
+
+def _get_file_response(request, path, content_type, etag):
+    file = open(path, "rb")
+    size = os.fstat(file.fileno()).st_size
+
+    byte_range = _parse_range(request, size, etag)
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    elif byte_range is False:
+        file.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    else:
+        # a bounded read instead of sendfile, which would send the file up
+        # to its end; range requests are rare (resumed downloads, players)
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(file, start, end), status=206, content_type=content_type
+        )
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _parse_range(request, size, etag):
+    # (start, end) of a satisfiable single range, False for an unsatisfiable
+    # one, None to send the whole file
+    header = request.headers.get("Range")
+    if not header:
+        return None
+
+    # the client's copy is outdated, it gets the current file in full
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range != etag:
+        return None
+
+    # multiple ranges are allowed to be answered with the whole file
+    match = _byte_range.match(header.strip())
+    if match is None:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # "bytes=-500" is the last 500 bytes
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end) if end else size - 1, size - 1)
+
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def _read_range(file, start, end):
+    with file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = file.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
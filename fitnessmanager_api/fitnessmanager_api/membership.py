@@ -0,0 +1,178 @@
+import calendar
+import datetime
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Customer, Payment
+from .sync import record_changes
+
+
+# Customer.active_membership, membership_start_date and membership_end_date
+# are derived from the payments. A membership is a run of consecutive paid
+# months, from the first day of its first month to the last day of its last
+# one; a month without a payment ends it. The dates are those of the run
+# covering the current month, or else of the latest run, and the membership
+# is active while today falls between them.
+
+
+def refresh_membership(customer_id, today=None):
+    today = today or timezone.localdate()
+    periods = (
+        Payment.objects.filter(customer_id=customer_id)
+        .values_list(_period(), flat=True)
+        .distinct()
+        .order_by(_period())
+    )
+    start_date, end_date = _get_membership_dates(list(periods), today)
+    Customer.objects.filter(pk=customer_id).update(
+        membership_start_date=start_date,
+        membership_end_date=end_date,
+        active_membership=_is_active(start_date, end_date, today),
+        updated_at=timezone.now(),
+    )
+    record_changes(Customer, [customer_id])
+
+
+def refresh_all_memberships(today=None):
+    today = today or timezone.localdate()
+    if connection.vendor == "postgresql":
+        return _refresh_all_memberships_postgresql(today)
+
+    periods = defaultdict(list)
+    paid = (
+        Payment.objects.values_list("customer_id", _period())
+        .distinct()
+        .order_by("customer_id", _period())
+    )
+    for customer_id, period in paid.iterator():
+        periods[customer_id].append(period)
+
+    customers = Customer.objects.order_by().values_list(
+        "pk", "membership_start_date", "membership_end_date", "active_membership"
+    )
+
+    now = timezone.now()
+    changed = []
+    for pk, *current in customers.iterator():
+        start_date, end_date = _get_membership_dates(periods.get(pk, []), today)
+        status = [start_date, end_date, _is_active(start_date, end_date, today)]
+        if status != current:
+            changed.append(
+                Customer(
+                    pk=pk,
+                    membership_start_date=status[0],
+                    membership_end_date=status[1],
+                    active_membership=status[2],
+                    updated_at=now,
+                )
+            )
+
+    Customer.objects.bulk_update(
+        changed,
+        ["membership_start_date", "membership_end_date", "active_membership", "updated_at"],
+        batch_size=1000,
+    )
+    record_changes(Customer, [customer.pk for customer in changed])
+    return len(changed)
+
+
+def _refresh_all_memberships_postgresql(today):
+    # consecutive months share period - row_number(), which numbers the runs
+    # ("gaps and islands"); DISTINCT ON then keeps the run of each customer
+    # covering the current month, or else the latest one
+    sql = """
+        WITH periods AS (
+            SELECT DISTINCT customer_id, paid_year * 12 + paid_month - 1 AS period
+            FROM {payment}
+        ),
+        runs AS (
+            SELECT customer_id, MIN(period) AS first_period, MAX(period) AS last_period
+            FROM (
+                SELECT customer_id, period,
+                       period - ROW_NUMBER() OVER (
+                           PARTITION BY customer_id ORDER BY period
+                       ) AS run
+                FROM periods
+            ) AS numbered
+            GROUP BY customer_id, run
+        ),
+        memberships AS (
+            SELECT DISTINCT ON (customer_id)
+                   customer_id,
+                   make_date(first_period / 12, mod(first_period, 12) + 1, 1) AS start_date,
+                   (make_date(last_period / 12, mod(last_period, 12) + 1, 1)
+                    + INTERVAL '1 month - 1 day')::date AS end_date
+            FROM runs
+            ORDER BY customer_id,
+                     %(current)s BETWEEN first_period AND last_period DESC,
+                     last_period DESC
+        )
+        UPDATE {customer} AS c
+        SET membership_start_date = agg.start_date,
+            membership_end_date = agg.end_date,
+            active_membership = agg.active,
+            updated_at = %(now)s
+        FROM (
+            SELECT c2.id, m.start_date, m.end_date,
+                   COALESCE(%(today)s BETWEEN m.start_date AND m.end_date, FALSE) AS active
+            FROM {customer} AS c2
+            LEFT JOIN memberships AS m ON m.customer_id = c2.id
+        ) AS agg
+        WHERE agg.id = c.id
+          AND (c.membership_start_date IS DISTINCT FROM agg.start_date
+               OR c.membership_end_date IS DISTINCT FROM agg.end_date
+               OR c.active_membership IS DISTINCT FROM agg.active)
+        RETURNING c.id
+    """.format(
+        customer=connection.ops.quote_name(Customer._meta.db_table),
+        payment=connection.ops.quote_name(Payment._meta.db_table),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            {"today": today, "current": _to_period(today), "now": timezone.now()},
+        )
+        changed = [pk for (pk,) in cursor.fetchall()]
+    record_changes(Customer, changed)
+    return len(changed)
+
+
+def _period(prefix=""):
+    # months since year 0, so that periods can be compared and aggregated
+    return F(f"{prefix}paid_year") * 12 + F(f"{prefix}paid_month") - 1
+
+
+def _to_period(date):
+    return date.year * 12 + date.month - 1
+
+
+def _get_membership_dates(periods, today):
+    # periods: the distinct paid periods, in ascending order
+    if not periods:
+        return None, None
+
+    runs = []
+    for period in periods:
+        if runs and period == runs[-1][1] + 1:
+            runs[-1][1] = period
+        else:
+            runs.append([period, period])
+
+    current = _to_period(today)
+    first_period, last_period = next(
+        (run for run in runs if run[0] <= current <= run[1]), runs[-1]
+    )
+
+    start_date = datetime.date(first_period // 12, first_period % 12 + 1, 1)
+    end_year, end_month = last_period // 12, last_period % 12 + 1
+    end_date = datetime.date(
+        end_year, end_month, calendar.monthrange(end_year, end_month)[1]
+    )
+    return start_date, end_date
+
+
+def _is_active(start_date, end_date, today):
+    return start_date is not None and start_date <= today <= end_date
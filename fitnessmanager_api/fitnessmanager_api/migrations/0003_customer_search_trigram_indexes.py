@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-18 11:05
+
+from django.db import migrations
+
+
+SEARCH_FIELDS = ['first_name', 'last_name', 'email', 'phone_number']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm only exists on PostgreSQL; other backends keep the plain scan
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field_name in SEARCH_FIELDS:
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS customer_{0}_trgm_idx '
+            'ON fitnessmanager_api_customer '
+            'USING gin (UPPER("{0}"::text) gin_trgm_ops)'.format(field_name)
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for field_name in SEARCH_FIELDS:
+        schema_editor.execute('DROP INDEX IF EXISTS customer_{0}_trgm_idx'.format(field_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitnessmanager_api', '0002_payment_period_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitnessmanager_api', '0003_customer_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('paid_month', models.PositiveIntegerField(choices=[(1, '1'), (2, '2'), (3, '3'), (4, '4'), (5, '5'), (6, '6'), (7, '7'), (8, '8'), (9, '9'), (10, '10'), (11, '11'), (12, '12')], verbose_name='Mes Pagado')),
+                ('paid_year', models.PositiveIntegerField(verbose_name='Año Pagado')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Revenue')),
+                ('payment_count', models.PositiveIntegerField(default=0, verbose_name='Pagos')),
+                ('average_discount', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Average Discount')),
+                ('paying_customers', models.PositiveIntegerField(default=0, verbose_name='Paying Customers')),
+                ('payment_methods', models.JSONField(default=dict, verbose_name='Payment Methods')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Monthly Revenue',
+                'verbose_name_plural': 'Monthly Revenue',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrevenue',
+            constraint=models.UniqueConstraint(fields=('paid_year', 'paid_month'), name='monthly_revenue_period_unique'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-18 14:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_brin_index(apps, schema_editor):
+    # rows are appended in checked_in_at order, so a BRIN index answers time
+    # range scans at a fraction of the size and write cost of a B-tree
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS attendance_checked_in_brin_idx '
+        'ON fitnessmanager_api_attendance USING brin (checked_in_at)'
+    )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX IF EXISTS attendance_checked_in_brin_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('fitnessmanager_api', '0004_monthlyrevenue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_in_at', models.DateTimeField(verbose_name='Check-in Time')),
+                ('customer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to=settings.AUTH_USER_MODEL, verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Attendance',
+                'verbose_name_plural': 'Attendance',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['customer', 'checked_in_at'], name='attendance_customer_time_idx'),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
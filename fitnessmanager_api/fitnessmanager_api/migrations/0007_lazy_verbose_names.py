@@ -0,0 +1,143 @@
+# Generated by Django 4.2 on 2026-10-18 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitnessmanager_api', '0006_updated_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='customer',
+            options={'verbose_name': 'Customer', 'verbose_name_plural': 'Customers'},
+        ),
+        migrations.AlterModelOptions(
+            name='payment',
+            options={'verbose_name': 'Payment', 'verbose_name_plural': 'Payments'},
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='customer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to=settings.AUTH_USER_MODEL, verbose_name='Customer'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='active_membership',
+            field=models.BooleanField(default=False, null=True, verbose_name='Active Membership'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='address',
+            field=models.CharField(max_length=255, null=True, verbose_name='Address'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='date_of_birth',
+            field=models.DateField(null=True, verbose_name='Date of Birth'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='email',
+            field=models.EmailField(max_length=255, unique=True, verbose_name='email address'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='height',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Height'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='membership_end_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Membership End Date'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='membership_start_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Membership Start Date'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='notes',
+            field=models.TextField(blank=True, null=True, verbose_name='Notes'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='passport_number',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Passport Number'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='phone_number',
+            field=models.CharField(max_length=20, null=True, verbose_name='Phone Number'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, upload_to='customer_profile_pictures', verbose_name='Profile Picture'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='registration_date',
+            field=models.DateTimeField(auto_now_add=True, null=True, verbose_name='Registration Date'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='weight',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Weight'),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrevenue',
+            name='paid_month',
+            field=models.PositiveIntegerField(choices=[(1, '1'), (2, '2'), (3, '3'), (4, '4'), (5, '5'), (6, '6'), (7, '7'), (8, '8'), (9, '9'), (10, '10'), (11, '11'), (12, '12')], verbose_name='Paid Month'),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrevenue',
+            name='paid_year',
+            field=models.PositiveIntegerField(verbose_name='Paid Year'),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrevenue',
+            name='payment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Payments'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True, verbose_name='Amount Paid'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='customer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to=settings.AUTH_USER_MODEL, verbose_name='Customer'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='date',
+            field=models.DateField(blank=True, null=True, verbose_name='Payment Date'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='discount_percent',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Discount Percent'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='paid_month',
+            field=models.PositiveIntegerField(choices=[(1, '1'), (2, '2'), (3, '3'), (4, '4'), (5, '5'), (6, '6'), (7, '7'), (8, '8'), (9, '9'), (10, '10'), (11, '11'), (12, '12')], verbose_name='Paid Month'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='paid_year',
+            field=models.PositiveIntegerField(choices=[(2023, '2023'), (2024, '2024'), (2025, '2025'), (2026, '2026'), (2027, '2027'), (2028, '2028'), (2029, '2029'), (2030, '2030'), (2031, '2031'), (2032, '2032'), (2033, '2033'), (2034, '2034'), (2035, '2035'), (2036, '2036'), (2037, '2037'), (2038, '2038'), (2039, '2039'), (2040, '2040'), (2041, '2041'), (2042, '2042')], verbose_name='Paid Year'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='payment_method',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Payment Method'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitnessmanager_api', '0008_blacklistedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model_name', models.CharField(choices=[('customer', 'customer'), ('payment', 'payment')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('logged_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.DeleteModel(
+            name='Tombstone',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_updated_idx',
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
-from django.utils.translation import gettext as _
+from django.db.models import Exists, OuterRef, Q
+from django.utils.translation import gettext_lazy as _
 
 
 # define the choices for the paid_month field
@@ -31,6 +32,14 @@ class CustomerManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def in_arrears(self, start, end):
+        # customers without any payment for a month between start and end
+        # (both (year, month) tuples), resolved as a single anti-join
+        period_payments = Payment.objects.for_period(start, end).filter(
+            customer=OuterRef("pk")
+        )
+        return self.get_queryset().filter(is_staff=False).filter(~Exists(period_payments))
+
 
 def generate_password():
     return "legacy"
@@ -68,6 +77,9 @@ class Customer(AbstractUser):
     height = models.DecimalField(
         max_digits=5, decimal_places=2, null=True, blank=True, verbose_name=_("Height")
     )
+    # not bumped by queryset.update() and bulk_update(), which have to set it
+    # themselves, see membership.py
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated At"))
     username = None
     email = models.EmailField(_('email address'), unique=True, max_length=255)
 
@@ -84,6 +96,18 @@ class Customer(AbstractUser):
         verbose_name_plural = _("Customers")
 
 
+class PaymentQuerySet(models.QuerySet):
+    def for_period(self, start, end):
+        (start_year, start_month), (end_year, end_month) = start, end
+        after_start = Q(paid_year__gt=start_year) | Q(
+            paid_year=start_year, paid_month__gte=start_month
+        )
+        before_end = Q(paid_year__lt=end_year) | Q(
+            paid_year=end_year, paid_month__lte=end_month
+        )
+        return self.filter(after_start & before_end)
+
+
 class Payment(models.Model):
     customer = models.ForeignKey(
         Customer, on_delete=models.CASCADE, related_name="payments", verbose_name=_("Customer")
@@ -106,6 +130,9 @@ class Payment(models.Model):
     payment_method = models.CharField(max_length=255, null=True, blank=True, verbose_name=_('Payment Method'))
     paid_month = models.PositiveIntegerField(verbose_name=_('Paid Month'), choices=PAID_MONTH_CHOICES)
     paid_year = models.PositiveIntegerField(verbose_name=_('Paid Year'), choices=PAID_YEAR_CHOICES)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated At"))
+
+    objects = PaymentQuerySet.as_manager()
 
     def __str__(self):
         return f"Pago {self.user.first_name} {self.user.last_name} - {self.date}"
@@ -113,3 +140,91 @@ class Payment(models.Model):
     class Meta:
         verbose_name = _("Payment")
         verbose_name_plural = _("Payments")
+        indexes = [
+            models.Index(
+                fields=["customer", "paid_year", "paid_month"],
+                name="payment_customer_period_idx",
+            ),
+            models.Index(fields=["paid_year", "paid_month"], name="payment_period_idx"),
+        ]
+
+
+class MonthlyRevenue(models.Model):
+    # rollup of the payments of a closed month, see reports.py
+    paid_month = models.PositiveIntegerField(verbose_name=_('Paid Month'), choices=PAID_MONTH_CHOICES)
+    paid_year = models.PositiveIntegerField(verbose_name=_('Paid Year'))
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name=_("Revenue"))
+    payment_count = models.PositiveIntegerField(default=0, verbose_name=_("Payments"))
+    average_discount = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True, verbose_name=_("Average Discount")
+    )
+    paying_customers = models.PositiveIntegerField(default=0, verbose_name=_("Paying Customers"))
+    payment_methods = models.JSONField(default=dict, verbose_name=_("Payment Methods"))
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.paid_month}/{self.paid_year}"
+
+    class Meta:
+        verbose_name = _("Monthly Revenue")
+        verbose_name_plural = _("Monthly Revenue")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["paid_year", "paid_month"], name="monthly_revenue_period_unique"
+            ),
+        ]
+
+
+class Attendance(models.Model):
+    # append-only, written in batches by attendance.record_check_in
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.CASCADE,
+        related_name="attendances",
+        verbose_name=_("Customer"),
+        # covered by attendance_customer_time_idx
+        db_index=False,
+    )
+    checked_in_at = models.DateTimeField(verbose_name=_("Check-in Time"))
+
+    def __str__(self):
+        return f"{self.customer_id} - {self.checked_in_at}"
+
+    class Meta:
+        verbose_name = _("Attendance")
+        verbose_name_plural = _("Attendance")
+        # the BRIN index on checked_in_at for time range scans is created by
+        # migration 0005 on PostgreSQL only
+        indexes = [
+            models.Index(
+                fields=["customer", "checked_in_at"], name="attendance_customer_time_idx"
+            ),
+        ]
+
+
+class Change(models.Model):
+    # customers and payments written or deleted by committed transactions, in
+    # commit order; read by the sync endpoint until they are pruned by the
+    # prune_changes command
+    CUSTOMER = "customer"
+    PAYMENT = "payment"
+
+    id = models.BigAutoField(primary_key=True)
+    model_name = models.CharField(
+        max_length=20, choices=[(CUSTOMER, CUSTOMER), (PAYMENT, PAYMENT)]
+    )
+    object_id = models.BigIntegerField()
+    logged_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.model_name} {self.object_id}"
+
+
+class BlacklistedToken(models.Model):
+    # ids of rotated refresh tokens, kept until the tokens expire and are
+    # pruned by the prune_token_blacklist command
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
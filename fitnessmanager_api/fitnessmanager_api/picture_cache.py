@@ -0,0 +1,136 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+
+# Rendered profile picture variants are stored on local disk under a name
+# derived from the source file identity and the requested transform, so a
+# changed upload never hits a stale entry. The modification time of a cache
+# file is refreshed on every hit and used as the LRU clock for eviction.
+#
+# The variants rendered eagerly on upload (derivatives.VARIANTS) are pinned:
+# they live in the VARIANTS_DIR subdirectory, which eviction never touches
+# and PROFILE_PICTURE_CACHE_MAX_SIZE does not count. Orphaned ones are
+# removed by the reconcile_profile_pictures command.
+
+
+# bump when the rendering itself changes, to orphan previously cached output
+CACHE_VERSION = 2
+
+VARIANTS_DIR = "variants"
+
+# the directory is scanned for eviction once per this share of
+# PROFILE_PICTURE_CACHE_MAX_SIZE written by a process, rather than on every
+# write; other processes' writes are seen at the next scan
+EVICTION_INTERVAL = 1 / 16
+
+_written = 0
+_written_lock = threading.Lock()
+
+
+def get_cache_key(source_path, transform):
+    stat = os.stat(source_path)
+    identity = (
+        f"{CACHE_VERSION}:{source_path}:{stat.st_mtime_ns}:{stat.st_size}:{transform!r}"
+    )
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def get(key, image_format="png"):
+    pinned_path = _get_path(key, image_format, pinned=True)
+    if os.path.exists(pinned_path):
+        return pinned_path
+
+    path = _get_path(key, image_format)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def put(key, data, image_format="png", pinned=False):
+    global _written
+
+    path = _get_path(key, image_format, pinned)
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # write to a temporary file first so concurrent readers never see a
+    # partially written picture
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as tmp_file:
+        tmp_file.write(data)
+    os.replace(tmp_path, path)
+    if pinned:
+        return path
+
+    with _written_lock:
+        _written += len(data)
+        due = _written >= settings.PROFILE_PICTURE_CACHE_MAX_SIZE * EVICTION_INTERVAL
+        if due:
+            _written = 0
+    if due:
+        evict(keep=path)
+    return path
+
+
+def is_pinned(key, image_format):
+    return os.path.exists(_get_path(key, image_format, pinned=True))
+
+
+def get_pinned_files():
+    # {file name: path} of the pinned variants
+    variants_dir = os.path.join(settings.PROFILE_PICTURE_CACHE_DIR, VARIANTS_DIR)
+    try:
+        with os.scandir(variants_dir) as it:
+            return {entry.name: entry.path for entry in it if not entry.name.endswith(".tmp")}
+    except FileNotFoundError:
+        return {}
+
+
+def evict(keep=None):
+    cache_dir = settings.PROFILE_PICTURE_CACHE_DIR
+    max_size = settings.PROFILE_PICTURE_CACHE_MAX_SIZE
+
+    entries = []
+    total_size = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".tmp") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+    if total_size <= max_size:
+        return
+
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= max_size:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+
+def get_file_name(key, image_format):
+    return f"{key}.{image_format}"
+
+
+def _get_path(key, image_format, pinned=False):
+    cache_dir = settings.PROFILE_PICTURE_CACHE_DIR
+    if pinned:
+        cache_dir = os.path.join(cache_dir, VARIANTS_DIR)
+    return os.path.join(cache_dir, get_file_name(key, image_format))
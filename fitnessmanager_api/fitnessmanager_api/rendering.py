@@ -0,0 +1,43 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+
+# JSON_RENDERER selects the encoder of API responses: "orjson" when it is
+# installed (the default), or "stdlib". Both produce the same documents, the
+# stdlib encoder just adds a space after separators. Values orjson does not
+# know about (Decimal, lazy translations) and dates are handed to
+# DjangoJSONEncoder, so they are rendered exactly as before.
+
+_encoder = DjangoJSONEncoder()
+
+
+def dumps(data):
+    if orjson is not None and settings.JSON_RENDERER == "orjson":
+        return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class JsonResponse(HttpResponse):
+    # drop-in for django.http.JsonResponse, encoded with dumps()
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # the browsable API asks for indented output, leave that to DRF
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
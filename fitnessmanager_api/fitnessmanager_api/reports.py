@@ -0,0 +1,131 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Avg, Count, Sum
+from django.utils import timezone
+
+from .models import Customer, MonthlyRevenue, Payment
+
+# amounts are stored with two decimal places; live totals are rounded the
+# same way, as SQLite returns the sums without trailing zeros
+CENT = Decimal("0.01")
+
+# Closed months (every month before the current one) are aggregated once and
+# stored in MonthlyRevenue; only the current month is aggregated on every
+# request. Payment signals delete the rollup of a month whose payments
+# change once their transaction commits, so it is recomputed on the next
+# request.
+#
+# The report may be read from a replica (REPLICA_VIEWS), but the rollups it
+# stores are aggregated on the database they are written to, so a lagging
+# replica cannot make a stale total permanent.
+
+
+def get_revenue_report(start, end):
+    today = timezone.localdate()
+    current = (today.year, today.month)
+    periods = _iter_periods(start, end)
+
+    rollups = {
+        (rollup.paid_year, rollup.paid_month): rollup
+        for rollup in MonthlyRevenue.objects.filter(
+            paid_year__gte=start[0], paid_year__lte=end[0]
+        )
+    }
+    missing_closed = [p for p in periods if p < current and p not in rollups]
+    if missing_closed:
+        db = router.db_for_write(MonthlyRevenue)
+        computed = _aggregate(missing_closed[0], missing_closed[-1], using=db)
+        new_rollups = [
+            _to_rollup(period, computed.get(period)) for period in missing_closed
+        ]
+        try:
+            with transaction.atomic(using=db):
+                MonthlyRevenue.objects.using(db).bulk_create(new_rollups)
+        except IntegrityError:
+            # another request stored the same months first
+            pass
+        rollups.update((period, rollup) for period, rollup in zip(missing_closed, new_rollups))
+
+    live = {}
+    if start <= current <= end:
+        live = _aggregate(current, current)
+
+    months = []
+    for period in periods:
+        if period < current:
+            months.append(_rollup_to_dict(rollups[period]))
+        elif period == current:
+            months.append(_rollup_to_dict(_to_rollup(period, live.get(period))))
+
+    return {
+        "months": months,
+        "active_members": Customer.objects.filter(active_membership=True).count(),
+    }
+
+
+def invalidate_period(paid_year, paid_month):
+    MonthlyRevenue.objects.filter(paid_year=paid_year, paid_month=paid_month).delete()
+
+
+def _aggregate(start, end, using=None):
+    # two GROUP BY queries over the period index, whatever the range
+    payments = Payment.objects.db_manager(using).for_period(start, end).order_by()
+    totals = payments.values("paid_year", "paid_month").annotate(
+        revenue=Sum("amount"),
+        payment_count=Count("id"),
+        average_discount=Avg("discount_percent"),
+        paying_customers=Count("customer", distinct=True),
+    )
+    methods = payments.values("paid_year", "paid_month", "payment_method").annotate(
+        revenue=Sum("amount"), payment_count=Count("id")
+    )
+
+    result = {}
+    for row in totals:
+        period = (row.pop("paid_year"), row.pop("paid_month"))
+        result[period] = dict(row, payment_methods={})
+    for row in methods:
+        period = (row["paid_year"], row["paid_month"])
+        result[period]["payment_methods"][row["payment_method"] or ""] = {
+            "revenue": str((row["revenue"] or Decimal(0)).quantize(CENT)),
+            "payment_count": row["payment_count"],
+        }
+    return result
+
+
+def _to_rollup(period, values):
+    values = values or {}
+    average_discount = values.get("average_discount")
+    return MonthlyRevenue(
+        paid_year=period[0],
+        paid_month=period[1],
+        revenue=(values.get("revenue") or Decimal(0)).quantize(CENT),
+        payment_count=values.get("payment_count", 0),
+        average_discount=(
+            Decimal(average_discount).quantize(CENT) if average_discount is not None else None
+        ),
+        paying_customers=values.get("paying_customers", 0),
+        payment_methods=values.get("payment_methods", {}),
+    )
+
+
+def _rollup_to_dict(rollup):
+    return {
+        "year": rollup.paid_year,
+        "month": rollup.paid_month,
+        "revenue": rollup.revenue,
+        "payment_count": rollup.payment_count,
+        "average_discount": rollup.average_discount,
+        "paying_customers": rollup.paying_customers,
+        "payment_methods": rollup.payment_methods,
+    }
+
+
+def _iter_periods(start, end):
+    periods = []
+    year, month = start
+    while (year, month) <= end:
+        periods.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
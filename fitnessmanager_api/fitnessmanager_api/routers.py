@@ -0,0 +1,128 @@
+import contextvars
+import fnmatch
+import hashlib
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+
+# Reads go to a replica only for the views matched by REPLICA_VIEWS, and only
+# for GET/HEAD requests. Everything else, and every request made in the
+# REPLICA_STICKY_SECONDS after a client's last write, reads from the primary,
+# so users always see their own changes. A request that saves or deletes a
+# model switches to the primary for the rest of its queries (see signals.py).
+
+_replica = contextvars.ContextVar("replica", default=None)
+
+SAFE_METHODS = ("GET", "HEAD")
+
+PRIMARY_APPS = {"sessions"}
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # a session created by a login is read by the very next request, under
+        # a cookie that has not written anything yet
+        if model._meta.app_label in PRIMARY_APPS:
+            return None
+        # None leaves the read on the default database
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        sticky_key = _get_sticky_key(request)
+        replica = None
+        if _may_read_from_replica(request, sticky_key) and not cache.get(sticky_key):
+            replica = random.choice(settings.DATABASE_REPLICAS)
+
+        token = _replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+
+        if _is_write(request, response, sticky_key):
+            cache.set(sticky_key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        sticky_key = _get_sticky_key(request)
+        replica = None
+        if _may_read_from_replica(request, sticky_key) and not await cache.aget(sticky_key):
+            replica = random.choice(settings.DATABASE_REPLICAS)
+
+        token = _replica.set(replica)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica.reset(token)
+
+        if _is_write(request, response, sticky_key):
+            await cache.aset(sticky_key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+
+def use_primary():
+    # the rest of the current request reads from the primary, which has the
+    # rows it has just written
+    _replica.set(None)
+
+
+def _may_read_from_replica(request, sticky_key):
+    if request.method not in SAFE_METHODS or sticky_key is None:
+        return False
+    try:
+        resolver_match = resolve(request.path_info, getattr(request, "urlconf", None))
+    except Resolver404:
+        return False
+    return _is_replica_view(resolver_match)
+
+
+def _is_write(request, response, sticky_key):
+    return request.method not in SAFE_METHODS and response.status_code < 400 and sticky_key
+
+
+def _is_replica_view(resolver_match):
+    # REPLICA_VIEWS holds URL names, optionally namespaced and with shell
+    # style wildcards, e.g. "revenue_report" or "admin:*_changelist"
+    if resolver_match is None or resolver_match.view_name is None:
+        return False
+    return any(
+        fnmatch.fnmatchcase(resolver_match.view_name, pattern)
+        for pattern in settings.REPLICA_VIEWS
+    )
+
+
+def _get_sticky_key(request):
+    # API clients are told apart by their token, admin users by their session
+    client = request.headers.get("Authorization") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not client:
+        return None
+    return "db-primary-sticky:" + hashlib.sha1(client.encode()).hexdigest()
@@ -0,0 +1,32 @@
+from django.db import connection
+from django.db.models import Q
+
+
+SEARCH_FIELDS = ("first_name", "last_name", "email", "phone_number")
+
+
+def search_customers(queryset, search_term, ranked=False):
+    # Every word has to match one of the search fields. The predicate is the
+    # same on every backend: on PostgreSQL the icontains lookups compile to
+    # UPPER("column"::text) LIKE ..., which is exactly the expression the
+    # trigram indexes of migration 0003 cover.
+    words = search_term.split()
+    for word in words:
+        word_filter = Q()
+        for field_name in SEARCH_FIELDS:
+            word_filter |= Q(**{f"{field_name}__icontains": word})
+        queryset = queryset.filter(word_filter)
+
+    if not ranked:
+        return queryset
+
+    if connection.vendor == "postgresql" and words:
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        from django.db.models.functions import Greatest
+
+        rank = Greatest(
+            *[TrigramWordSimilarity(search_term, field_name) for field_name in SEARCH_FIELDS]
+        )
+        return queryset.annotate(rank=rank).order_by("-rank", "last_name", "first_name")
+
+    return queryset.order_by("last_name", "first_name")
@@ -13,6 +13,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 import django.utils.translation
+from django.core.exceptions import ImproperlyConfigured
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,6 +31,15 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["0.0.0.0", "78.47.197.88"]
 
+# "wsgi" or "asgi", picks the application gunicorn.conf.py serves
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+
+# route CustomerData and GetProfilePicture to their async versions
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", str(SERVER_MODE == "asgi")).lower() == "true"
+
+# threads rendering profile pictures for the async views
+IMAGE_THREADS = int(os.getenv("IMAGE_THREADS", 4))
+
 
 # Application definition
 
@@ -48,31 +58,56 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "fitnessmanager_api.authentication.LazyJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "fitnessmanager_api.rendering.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # "format" is a parameter of api/profile_picture/, not a renderer choice
+    "URL_FORMAT_OVERRIDE": None,
 }
 
+# encoder of API responses, "orjson" (used when installed) or "stdlib"
+JSON_RENDERER = os.getenv("JSON_RENDERER", "orjson")
+
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
+    # honoured by authentication.CustomerTokenRefreshSerializer, the
+    # token_blacklist app is not installed
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# in-process cache of the customers loaded for token authenticated requests
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", 30))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", 1024))
+
 
 MIDDLEWARE = [
+    "fitnessmanager_api.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # brotli or gzip, has to run after everything else touching the body
+    "fitnessmanager_api.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "fitnessmanager_api.routers.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.locale.LocaleMiddleware",
 ]
 
+# share of requests measured by InstrumentationMiddleware
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", 0.1))
+
+# bearer token for scraping /metrics; without one only staff may read it
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
 ROOT_URLCONF = "fitnessmanager_api.urls"
 
 TEMPLATES = [
@@ -105,9 +140,110 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        # Persistent connections are reused by the threads of a WSGI worker.
+        # Under ASGI every request may run on a new thread, so they default
+        # to off there and a pooler such as PgBouncer should be put in front
+        # (DATABASE_POOLER=true) instead.
+        "CONN_MAX_AGE": int(os.getenv("CONN_MAX_AGE", 0 if SERVER_MODE == "asgi" else 60)),
+        "CONN_HEALTH_CHECKS": True,
+        # transaction pooling does not keep the named cursors iterator() uses
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv("DATABASE_POOLER", "false").lower() == "true",
+    }
+}
+
+if os.getenv("SQLITE_PATH"):
+    # local runs without Postgres, e.g. the benchmarks on a laptop
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("SQLITE_PATH"),
+    }
+    # a database of its own for the replica routing tests, only read from
+    # outside of them with SQLITE_REPLICA_PATH (below)
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("SQLITE_PATH") + "-replica",
+    }
+
+# Read replicas, as comma separated hosts of streaming replicas of the
+# default database. ReplicaRoutingMiddleware sends the reads of the views in
+# REPLICA_VIEWS to them.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv("DATABASE_REPLICA_HOSTS", "").split(","))):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        # tests create a single database and read it through every alias
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+if os.getenv("SQLITE_REPLICA_PATH"):
+    # a second SQLite file standing in for a replica in local runs; it has to
+    # be migrated and filled separately (migrate --database replica)
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("SQLITE_REPLICA_PATH"),
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append("replica")
+
+DATABASE_ROUTERS = ["fitnessmanager_api.routers.ReplicaRouter"] if DATABASE_REPLICAS else []
+
+# URL names (shell style wildcards allowed) whose GET requests read from a
+# replica. customer_data and sync stay on the primary: a lagging replica
+# would put stale rows into the CustomerData cache and would let the sync
+# cursor move past rows the replica has not received yet.
+REPLICA_VIEWS = [
+    "admin:*_changelist",
+    "customers_in_arrears",
+    "customer_search",
+    "revenue_report",
+]
+# how long a client reads from the primary after a write, to see its own
+# changes; should exceed the usual replication lag. Kept in the default
+# cache, which is why replicas require REDIS_URL (see below).
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # a handful of counters that must not be culled along with the rows in
+    # "default", see customer_cache.py
+    "customer-data-state": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "customer-data-state",
+    },
 }
 
+if os.getenv("REDIS_URL"):
+    # requires the redis package; shares the cache between all workers
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+    # the counters have no timeout, so Redis only evicts them under an
+    # allkeys-* maxmemory policy
+    CACHES["customer-data-state"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+        "KEY_PREFIX": "customer-data-state",
+    }
+elif os.getenv("DATABASE_REPLICA_HOSTS"):
+    # a write handled by one worker has to pin its client to the primary on
+    # every worker; the single process SQLite replica does without
+    raise ImproperlyConfigured("DATABASE_REPLICA_HOSTS requires REDIS_URL")
+
+# cache alias and lifetime of the serialized CustomerData rows, and the
+# alias of their version counters
+CUSTOMER_DATA_CACHE = "default"
+CUSTOMER_DATA_STATE_CACHE = "customer-data-state"
+CUSTOMER_DATA_CACHE_TIMEOUT = int(os.getenv("CUSTOMER_DATA_CACHE_TIMEOUT", 3600))
+
 AUTH_USER_MODEL = 'fitnessmanager_api.Customer'
 
 AUTHENTICATION_BACKENDS = [
@@ -162,6 +298,57 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "static/files")
 
+# uploads (profile pictures) are stored relative to the project directory
+# and only served through the authenticated media/ route, see media.py
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", str(BASE_DIR))
+
+# Rendered profile picture variants (thumbnails, round/oval shapes). The size
+# limit applies to the ones rendered on request; the variants rendered on
+# upload are kept in a "variants" subdirectory until their picture changes
+PROFILE_PICTURE_CACHE_DIR = os.getenv(
+    "PROFILE_PICTURE_CACHE_DIR", os.path.join(BASE_DIR, "profile_picture_cache")
+)
+PROFILE_PICTURE_CACHE_MAX_SIZE = int(
+    os.getenv("PROFILE_PICTURE_CACHE_MAX_SIZE", 256 * 1024 * 1024)
+)
+
+# who sends picture files once the request has been authorized: "django"
+# (FileResponse/sendfile), "x-accel-redirect" (nginx, with internal locations
+# aliasing MEDIA_ROOT and PROFILE_PICTURE_CACHE_DIR at the prefixes below) or
+# "x-sendfile" (Apache/lighttpd)
+MEDIA_SERVING = os.getenv("MEDIA_SERVING", "django")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected/media/")
+PROFILE_PICTURE_CACHE_ACCEL_PREFIX = os.getenv(
+    "PROFILE_PICTURE_CACHE_ACCEL_PREFIX", "/protected/picture-cache/"
+)
+
+# Worker processes rendering picture variants after an upload (0 renders them
+# synchronously in the saving process) and the number of uploads allowed to
+# wait for a worker before new ones are left to the lazy path
+PROFILE_PICTURE_WORKERS = int(os.getenv("PROFILE_PICTURE_WORKERS", 2))
+PROFILE_PICTURE_MAX_PENDING = int(os.getenv("PROFILE_PICTURE_MAX_PENDING", 32))
+
+# check-ins are buffered per process and written with one INSERT once this
+# many are pending or the oldest has waited this many seconds, see
+# attendance.py; at most ATTENDANCE_MAX_PENDING are kept while the database
+# is unavailable
+ATTENDANCE_BATCH_SIZE = int(os.getenv("ATTENDANCE_BATCH_SIZE", 100))
+ATTENDANCE_FLUSH_INTERVAL = float(os.getenv("ATTENDANCE_FLUSH_INTERVAL", 1.0))
+ATTENDANCE_MAX_PENDING = int(os.getenv("ATTENDANCE_MAX_PENDING", 10_000))
+
+# api/sync/ only reads the change log up to entries logged at least this
+# many seconds ago, which has to cover a single INSERT into it, see sync.py
+SYNC_SETTLE_SECONDS = int(os.getenv("SYNC_SETTLE_SECONDS", 2))
+# the change log is kept this long by prune_changes; clients with an older
+# cursor have to sync from scratch
+SYNC_CHANGE_RETENTION_DAYS = int(os.getenv("SYNC_CHANGE_RETENTION_DAYS", 30))
+
+# import time allowed for django.setup() and for the first request's URLconf,
+# enforced by the startup_profile command
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", 600))
+STARTUP_URLS_BUDGET_MS = float(os.getenv("STARTUP_URLS_BUDGET_MS", 1200))
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
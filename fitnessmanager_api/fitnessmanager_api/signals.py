@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import customer_cache, routers
+from .derivatives import schedule_variants
+from .reports import invalidate_period
+from .membership import refresh_membership
+from .models import Customer, Payment
+from .sync import record_changes
+
+
+@receiver(pre_save)
+@receiver(pre_delete)
+def read_from_primary(sender, **kwargs):
+    routers.use_primary()
+
+
+@receiver(post_save, sender=Customer)
+def generate_profile_picture_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "profile_picture" not in update_fields:
+        return
+
+    if not instance.profile_picture:
+        return
+
+    source_path = instance.profile_picture.path
+    transaction.on_commit(lambda: schedule_variants(source_path))
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def update_membership_status(sender, instance, **kwargs):
+    refresh_membership(instance.customer_id)
+    _invalidate_customer_data(instance.customer_id)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_data(sender, instance, **kwargs):
+    _invalidate_customer_data(instance.pk)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def forget_authenticated_customer(sender, instance, **kwargs):
+    # authentication imports simplejwt, which is slow to import and not
+    # needed by management commands
+    from .authentication import forget_user
+
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def record_change(sender, instance, **kwargs):
+    # reported to syncing clients, see sync.py
+    record_changes(sender, [instance.pk])
+
+
+def _invalidate_customer_data(customer_id):
+    # after commit, so that a concurrent request cannot cache the old row again
+    transaction.on_commit(lambda: customer_cache.invalidate_customer(customer_id))
+
+
+@receiver(pre_save, sender=Payment)
+def invalidate_previous_revenue_period(sender, instance, **kwargs):
+    # an edited payment may have moved to another month
+    if instance.pk is None:
+        return
+    previous = (
+        Payment.objects.filter(pk=instance.pk).values_list("paid_year", "paid_month").first()
+    )
+    if previous is not None and previous != (instance.paid_year, instance.paid_month):
+        _invalidate_revenue_period(*previous)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_revenue_period(sender, instance, **kwargs):
+    _invalidate_revenue_period(instance.paid_year, instance.paid_month)
+
+
+def _invalidate_revenue_period(paid_year, paid_month):
+    # after commit, so that a concurrent report cannot store a rollup of the
+    # payments as they were before this transaction
+    transaction.on_commit(lambda: invalidate_period(paid_year, paid_month))
@@ -0,0 +1,232 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import derivatives, picture_cache
+from .models import Change, Customer, Payment
+
+
+# Clients sync from a log of the customers and payments that have been
+# written or deleted (models.Change), read in id order from their cursor.
+# Timestamps cannot order changes: they are taken when a row is saved, while
+# the row only becomes visible when its transaction commits, so a slow
+# transaction could appear behind a cursor that has already moved past it.
+# The log entries are inserted once the transaction has committed instead,
+# each batch in a transaction of a single INSERT.
+#
+# Ids are still allocated before those inserts commit, so two concurrent
+# inserts can commit out of order. The log is only read up to entries logged
+# SYNC_SETTLE_SECONDS ago, which has to cover one such INSERT, not the
+# transactions writing the rows.
+#
+# A client without a cursor first pages through every customer and payment
+# by id, then continues with the entries logged since it started.
+
+CUSTOMER_FIELDS = [
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "address",
+    "passport_number",
+    "date_of_birth",
+    "active_membership",
+    "membership_start_date",
+    "membership_end_date",
+    "weight",
+    "height",
+    "notes",
+    "is_active",
+    "profile_picture",
+    "updated_at",
+]
+
+PAYMENT_FIELDS = [
+    "id",
+    "customer_id",
+    "date",
+    "amount",
+    "discount_percent",
+    "payment_method",
+    "paid_month",
+    "paid_year",
+    "updated_at",
+]
+
+MODELS = {
+    Change.CUSTOMER: (Customer, CUSTOMER_FIELDS),
+    Change.PAYMENT: (Payment, PAYMENT_FIELDS),
+}
+
+MODEL_NAMES = {model: model_name for model_name, (model, _) in MODELS.items()}
+
+# the collections of the response, in the order a first sync pages through them
+COLLECTIONS = {"customers": Change.CUSTOMER, "payments": Change.PAYMENT}
+
+DEFAULT_PAGE_SIZE = 500
+
+
+class CursorExpired(Exception):
+    # the log entries the cursor still needs may have been pruned
+    pass
+
+
+def record_changes(model, ids):
+    # for everything that writes customers or payments without sending
+    # post_save/post_delete, which record their own rows (see signals.py)
+    model_name = MODEL_NAMES[model]
+    ids = list(ids)
+    if not ids:
+        return
+
+    transaction.on_commit(
+        lambda: Change.objects.bulk_create(
+            [Change(model_name=model_name, object_id=pk) for pk in ids], batch_size=1000
+        )
+    )
+
+
+def parse_cursor(value):
+    if not value:
+        return {}
+
+    try:
+        data = json.loads(base64.urlsafe_b64decode(value.encode()))
+        cursor = {"change": int(data.pop("change")), "at": _parse_time(data.pop("at"))}
+        for name, pk in data.items():
+            if name not in COLLECTIONS:
+                raise ValueError(value)
+            cursor[name] = int(pk)
+        return cursor
+    except (AttributeError, KeyError, TypeError) as exc:
+        raise ValueError(value) from exc
+
+
+def get_changes(cursor, limit):
+    now = timezone.now()
+    retention = datetime.timedelta(days=settings.SYNC_CHANGE_RETENTION_DAYS)
+    if cursor and cursor["at"] < now - retention:
+        raise CursorExpired()
+
+    if not cursor:
+        # everything logged up to here is in the rows the first pages return
+        last_change = Change.objects.aggregate(last=Max("id"))["last"] or 0
+        cursor = {"change": last_change, "at": now, **{name: 0 for name in COLLECTIONS}}
+
+    if any(name in cursor for name in COLLECTIONS):
+        return _get_rows(cursor, limit)
+    horizon = now - datetime.timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    return _get_logged_changes(cursor, limit, horizon)
+
+
+def _get_rows(cursor, limit):
+    # a page of a first sync, by id through the customers, then the payments
+    next_cursor = dict(cursor)
+    rows = {name: [] for name in COLLECTIONS}
+    remaining = limit
+    for name, model_name in COLLECTIONS.items():
+        if name not in next_cursor or not remaining:
+            continue
+
+        model, fields = MODELS[model_name]
+        page = list(
+            model.objects.filter(pk__gt=next_cursor[name])
+            .order_by("pk")
+            .values(*fields)[: remaining + 1]
+        )
+        rows[name] = page[:remaining]
+        if len(page) > remaining:
+            next_cursor[name] = page[remaining - 1]["id"]
+            remaining = 0
+        else:
+            del next_cursor[name]
+            remaining -= len(page)
+
+    # the changes logged meanwhile follow
+    return _get_response(rows, {"customers": [], "payments": []}, next_cursor, True)
+
+
+def _get_logged_changes(cursor, limit, horizon):
+    entries = list(
+        Change.objects.filter(id__gt=cursor["change"], logged_at__lt=horizon)
+        .order_by("id")
+        .values_list("id", "model_name", "object_id", "logged_at")[: limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    changed = {model_name: set() for model_name in MODELS}
+    for _, model_name, object_id, _ in entries:
+        changed[model_name].add(object_id)
+
+    rows = {}
+    deleted = {}
+    for name, model_name in COLLECTIONS.items():
+        model, fields = MODELS[model_name]
+        rows[name] = list(
+            model.objects.filter(pk__in=changed[model_name]).order_by("pk").values(*fields)
+        )
+        # rows that are gone have been deleted since they were logged
+        deleted[name] = sorted(changed[model_name] - {row["id"] for row in rows[name]})
+
+    if has_more:
+        last_id, _, _, logged_at = entries[-1]
+        next_cursor = {"change": last_id, "at": logged_at}
+    else:
+        # everything logged before the horizon has been seen
+        last_id = entries[-1][0] if entries else cursor["change"]
+        next_cursor = {"change": last_id, "at": horizon}
+    return _get_response(rows, deleted, next_cursor, has_more)
+
+
+def _get_response(rows, deleted, cursor, has_more):
+    for customer in rows["customers"]:
+        customer["picture_variants"] = _get_picture_variants(customer.pop("profile_picture"))
+
+    return {
+        "customers": rows["customers"],
+        "payments": rows["payments"],
+        "deleted": deleted,
+        "cursor": _encode_cursor(cursor),
+        "has_more": has_more,
+    }
+
+
+def _get_picture_variants(name):
+    # the hashes are the ETags api/profile_picture/ serves for each variant,
+    # so a client only downloads the pictures whose hash it does not have
+    if not name:
+        return {}
+
+    source_path = default_storage.path(name)
+    try:
+        return {
+            _get_variant_name(transform): picture_cache.get_cache_key(source_path, transform)
+            for transform in derivatives.VARIANTS
+        }
+    except FileNotFoundError:
+        return {}
+
+
+def _get_variant_name(transform):
+    size = "thumbnail" if transform.size else "original"
+    return f"{transform.shape}-{size}.{transform.image_format}"
+
+
+def _parse_time(value):
+    timestamp = datetime.datetime.fromisoformat(value)
+    if timezone.is_naive(timestamp):
+        raise ValueError(value)
+    return timestamp
+
+
+def _encode_cursor(cursor):
+    data = {**cursor, "at": cursor["at"].isoformat()}
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from fitnessmanager_api.admin import CustomerAdmin
+from fitnessmanager_api.models import Customer, Payment
+
+
+class CustomerChangelistTests(TestCase):
+    # session, user, the paginator's and the unfiltered count, the annotated
+    # page (payment columns included) and the content type of the admin log
+    CHANGELIST_QUERIES = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        today = timezone.localdate()
+        customers = Customer.objects.bulk_create(
+            Customer(
+                email=f"member{index}@example.com",
+                first_name="Member",
+                last_name=str(index),
+                profile_picture="customer_profile_pictures/member.png",
+            )
+            for index in range(120)
+        )
+        Payment.objects.bulk_create(
+            Payment(customer=customer, amount="30.00", paid_year=today.year, paid_month=month)
+            for customer in customers
+            for month in range(1, 4)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def _count_queries(self, per_page):
+        with mock.patch.object(CustomerAdmin, "list_per_page", per_page):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/admin/fitnessmanager_api/customer/")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Member")
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_the_page_size(self):
+        self.assertEqual(self._count_queries(10), self._count_queries(100))
+
+    def test_query_count(self):
+        with mock.patch.object(CustomerAdmin, "list_per_page", 100):
+            with self.assertNumQueries(self.CHANGELIST_QUERIES):
+                self.client.get("/admin/fitnessmanager_api/customer/")
@@ -0,0 +1,47 @@
+import json
+from unittest import mock
+
+from django.test import AsyncRequestFactory, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api import async_views
+from fitnessmanager_api.models import Customer
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        Customer.objects.create_user(
+            "member@example.com", "password", first_name="Juan", last_name="Pérez"
+        )
+        self.factory = AsyncRequestFactory()
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.staff)}"}
+
+    async def test_stream_is_sent_in_batches(self):
+        request = self.factory.get(
+            "/customer-data/", {"stream": "true"}, headers=self.headers
+        )
+
+        with mock.patch.object(async_views, "STREAM_CHUNK_SIZE", 2):
+            response = await async_views.AsyncCustomerData.as_view()(request)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response]
+
+        self.assertGreater(len(chunks), 1)
+        rows = json.loads(b"".join(chunks))["customer_data"]
+        self.assertEqual(len(rows), 2)
+
+    async def test_image_threads_do_not_load_the_customer(self):
+        request = self.factory.get("/api/profile_picture/", headers=self.headers)
+        loaded_in_image_thread = []
+
+        def serve(request, customer, transform):
+            loaded_in_image_thread.append("_wrapped" in vars(customer) and customer._wrapped)
+            return async_views.JsonResponse({})
+
+        with mock.patch.object(async_views, "serve_profile_picture", serve):
+            await async_views.AsyncGetProfilePicture.as_view()(request)
+
+        self.assertIsInstance(loaded_in_image_thread[0], Customer)
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.db import IntegrityError, OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from fitnessmanager_api import attendance
+from fitnessmanager_api.models import Attendance, Customer
+
+
+class AttendanceTestMixin:
+    def setUp(self):
+        self.customers = [
+            Customer.objects.create_user(
+                f"member{i}@example.com", "password", first_name="Member", last_name=str(i)
+            )
+            for i in range(3)
+        ]
+        self.addCleanup(self._discard_pending)
+
+    def _discard_pending(self):
+        with attendance._lock:
+            attendance._take_pending()
+
+    def _check_in(self, customer):
+        attendance.record_check_in(customer.pk, timezone.now())
+
+
+@override_settings(ATTENDANCE_BATCH_SIZE=3, ATTENDANCE_FLUSH_INTERVAL=3600)
+class AttendanceBufferTests(AttendanceTestMixin, TestCase):
+    def test_check_ins_are_buffered_until_flushed(self):
+        self._check_in(self.customers[0])
+        self._check_in(self.customers[1])
+
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(attendance.flush(), 2)
+        self.assertEqual(Attendance.objects.count(), 2)
+
+    def test_a_full_batch_is_written_immediately(self):
+        for customer in self.customers:
+            self._check_in(customer)
+
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(attendance.flush(), 0)
+
+    def test_unavailable_database_requeues_the_batch(self):
+        self._check_in(self.customers[0])
+
+        with mock.patch.object(attendance, "_bulk_create", side_effect=OperationalError):
+            with self.assertLogs(attendance.logger, "ERROR"):
+                attendance.flush()
+        self.assertFalse(Attendance.objects.exists())
+
+        self.assertEqual(attendance.flush(), 1)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_rejected_rows_are_dropped_without_raising(self):
+        for customer in self.customers[:2]:
+            self._check_in(customer)
+
+        with mock.patch.object(attendance, "_bulk_create", side_effect=IntegrityError):
+            with self.assertLogs(attendance.logger, "ERROR"):
+                self._check_in(self.customers[2])
+
+        self.assertEqual(attendance.flush(), 0)
+        self.assertFalse(Attendance.objects.exists())
+
+
+# foreign keys are only checked on commit, which TestCase never reaches
+@override_settings(ATTENDANCE_BATCH_SIZE=3, ATTENDANCE_FLUSH_INTERVAL=3600)
+class DeletedCustomerTests(AttendanceTestMixin, TransactionTestCase):
+    def test_check_ins_of_a_deleted_customer_are_dropped(self):
+        self._check_in(self.customers[0])
+        self._check_in(self.customers[1])
+        Customer.objects.filter(pk=self.customers[0].pk).delete()
+
+        with self.assertLogs(attendance.logger, "WARNING"):
+            self._check_in(self.customers[2])
+
+        self.assertEqual(
+            set(Attendance.objects.values_list("customer_id", flat=True)),
+            {self.customers[1].pk, self.customers[2].pk},
+        )
@@ -0,0 +1,38 @@
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from fitnessmanager_api.authentication import CustomerTokenObtainPairSerializer
+from fitnessmanager_api.models import BlacklistedToken, Customer
+
+
+class TokenRefreshTests(TestCase):
+    def setUp(self):
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        self.refresh = str(CustomerTokenObtainPairSerializer.get_token(self.staff))
+
+    def _refresh(self, token):
+        return self.client.post("/api/token/refresh/", {"refresh": token})
+
+    def test_refresh_stamps_claims_from_the_database(self):
+        Customer.objects.filter(pk=self.staff.pk).update(is_staff=False)
+
+        response = self._refresh(self.refresh)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(RefreshToken(response.json()["refresh"])["is_staff"])
+        access = response.json()["access"]
+        response = self.client.get("/api/arrears/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(response.status_code, 403)
+
+    def test_inactive_customer_cannot_refresh(self):
+        Customer.objects.filter(pk=self.staff.pk).update(is_active=False)
+
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
+
+    def test_rotated_token_cannot_be_replayed(self):
+        self.assertEqual(self._refresh(self.refresh).status_code, 200)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
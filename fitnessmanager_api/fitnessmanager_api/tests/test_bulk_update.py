@@ -0,0 +1,133 @@
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api import authentication
+from fitnessmanager_api.models import Customer
+
+
+class BulkCustomerUpdateTests(TestCase):
+    def setUp(self):
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        self.first = Customer.objects.create_user(
+            "first@example.com", "password", first_name="Juan", last_name="Pérez"
+        )
+        self.second = Customer.objects.create_user(
+            "second@example.com", "password", first_name="Ana", last_name="López"
+        )
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.staff)}"
+
+    def _patch(self, items):
+        response = self.client.patch(
+            "/api/customers/bulk/", items, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_duplicate_email_is_a_row_error(self):
+        result = self._patch(
+            [
+                {"id": self.first.pk, "changes": {"email": "staff@example.com"}},
+                {"id": self.second.pk, "changes": {"first_name": "Anna"}},
+            ]
+        )
+
+        self.assertEqual(result["updated"], [self.second.pk])
+        self.assertEqual(
+            result["errors"], [{"id": self.first.pk, "errors": {"email": "Value already in use"}}]
+        )
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.first_name, "Anna")
+
+    def test_same_email_claimed_twice_is_rejected_for_both(self):
+        result = self._patch(
+            [
+                {"id": self.first.pk, "changes": {"email": "new@example.com"}},
+                {"id": self.second.pk, "changes": {"email": "new@example.com"}},
+            ]
+        )
+
+        self.assertEqual(result["updated"], [])
+        self.assertEqual(len(result["errors"]), 2)
+
+    def test_keeping_the_own_email_is_allowed(self):
+        result = self._patch([{"id": self.first.pk, "changes": {"email": "first@example.com"}}])
+
+        self.assertEqual(result, {"updated": [self.first.pk], "errors": []})
+
+    def test_values_over_the_column_limits_are_row_errors(self):
+        result = self._patch(
+            [
+                {"id": self.first.pk, "changes": {"phone_number": "1" * 50}},
+                {"id": self.second.pk, "changes": {"weight": "12345.5"}},
+            ]
+        )
+
+        self.assertEqual(result["updated"], [])
+        self.assertEqual(
+            result["errors"],
+            [
+                {"id": self.first.pk, "errors": {"phone_number": "Invalid value"}},
+                {"id": self.second.pk, "errors": {"weight": "Invalid value"}},
+            ],
+        )
+
+    def test_empty_values_are_still_accepted(self):
+        result = self._patch([{"id": self.first.pk, "changes": {"phone_number": None}}])
+
+        self.assertEqual(result["updated"], [self.first.pk])
+
+    def test_duplicate_ids_are_row_errors(self):
+        result = self._patch(
+            [
+                {"id": self.first.pk, "changes": {"first_name": "Juana"}},
+                {"id": self.first.pk, "changes": {"first_name": "Juanita"}},
+                {"id": self.second.pk, "changes": {"first_name": "Anna"}},
+            ]
+        )
+
+        self.assertEqual(result["updated"], [self.second.pk])
+        self.assertEqual(
+            result["errors"],
+            [{"id": self.first.pk, "errors": {"id": "Duplicate id"}}] * 2,
+        )
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.first_name, "Juan")
+
+    def test_items_without_a_changes_object_are_row_errors(self):
+        result = self._patch(
+            [
+                {"id": self.first.pk, "changes": ["first_name", "Juana"]},
+                "first_name",
+                {"id": self.second.pk, "changes": {"first_name": "Anna"}},
+            ]
+        )
+
+        self.assertEqual(result["updated"], [self.second.pk])
+        self.assertEqual(len(result["errors"]), 2)
+
+    def test_authenticated_users_are_forgotten(self):
+        authentication.get_user(self.first.pk)
+        self.addCleanup(authentication.forget_user, self.first.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._patch([{"id": self.first.pk, "changes": {"first_name": "Juana"}}])
+
+        self.assertEqual(authentication.get_user(self.first.pk).first_name, "Juana")
+
+
+class CustomerDataPutBodyTests(TestCase):
+    def test_changes_must_be_an_object(self):
+        customer = Customer.objects.create_user(
+            "member@example.com", "password", first_name="Juan", last_name="Pérez"
+        )
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(customer)}"}
+
+        for body in (["first_name", "Juana"], "Juana", 1):
+            with self.subTest(body=body):
+                response = self.client.put(
+                    "/customer-data/", body, content_type="application/json",
+                    headers=headers,
+                )
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,121 @@
+import datetime
+import io
+import os
+import tempfile
+from decimal import Decimal
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from fitnessmanager_api.models import Customer, Payment
+
+
+class CsvTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _export(self, model, lang="en"):
+        path = os.path.join(self.directory.name, f"{model}-{lang}.csv")
+        call_command("export_csv", model, "--lang", lang, "--output", path)
+        return path
+
+    def _import(self, model, path, lang="en"):
+        call_command("import_csv", model, path, "--lang", lang, stdout=io.StringIO())
+
+    def _write(self, content):
+        path = os.path.join(self.directory.name, "import.csv")
+        with open(path, "w", newline="") as csv_file:
+            csv_file.write(content)
+        return path
+
+
+class RoundTripTests(CsvTestCase):
+    def setUp(self):
+        super().setUp()
+        self.registered = timezone.now().replace(microsecond=0) - datetime.timedelta(days=400)
+        self.customer = Customer.objects.create_user(
+            "member@example.com", "password", first_name="Member", last_name="One",
+            notes="Likes, commas", weight=Decimal("70.50"),
+        )
+        Customer.objects.filter(pk=self.customer.pk).update(registration_date=self.registered)
+        self.payment = Payment.objects.create(
+            customer=self.customer, amount="30.00", payment_method="cash",
+            paid_year=2024, paid_month=3,
+        )
+
+    def _round_trip(self, lang):
+        customers = self._export("customers", lang)
+        payments = self._export("payments", lang)
+        Customer.objects.all().delete()
+
+        self._import("customers", customers, lang)
+        self._import("payments", payments, lang)
+
+    def test_rows_survive_a_round_trip(self):
+        for lang in ("en", "es"):
+            with self.subTest(lang=lang):
+                self._round_trip(lang)
+
+                customer = Customer.objects.get()
+                self.assertEqual(customer.pk, self.customer.pk)
+                self.assertEqual(customer.email, "member@example.com")
+                self.assertEqual(customer.notes, "Likes, commas")
+                self.assertEqual(customer.weight, Decimal("70.50"))
+                self.assertEqual(customer.registration_date, self.registered)
+                payment = Payment.objects.get()
+                self.assertEqual(payment.customer_id, customer.pk)
+                self.assertEqual(payment.amount, Decimal("30.00"))
+                self.assertEqual((payment.paid_year, payment.paid_month), (2024, 3))
+
+    def test_imported_payments_refresh_the_membership(self):
+        self._round_trip("en")
+
+        customer = Customer.objects.get()
+        self.assertEqual(customer.membership_start_date, datetime.date(2024, 3, 1))
+        self.assertEqual(customer.membership_end_date, datetime.date(2024, 3, 31))
+
+
+class InvalidRowTests(CsvTestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = Customer.objects.create_user(
+            "member@example.com", "password", first_name="Member", last_name="One"
+        )
+
+    def test_unknown_columns_are_reported(self):
+        path = self._write("email,favourite_colour\nnew@example.com,blue\n")
+
+        with self.assertRaisesMessage(CommandError, "Unknown columns: favourite_colour"):
+            self._import("customers", path)
+
+    def test_duplicate_email_is_reported_with_its_row(self):
+        path = self._write(
+            "email,first_name,last_name\n"
+            "new@example.com,New,Member\n"
+            "member@example.com,Duplicate,Member\n"
+        )
+
+        with self.assertRaisesMessage(CommandError, "Row 2:"):
+            self._import("customers", path)
+        self.assertFalse(Customer.objects.filter(email="new@example.com").exists())
+
+    def test_invalid_values_are_reported_with_their_row(self):
+        path = self._write(
+            "customer,amount,paid_month,paid_year\n"
+            f"{self.customer.pk},30.00,1,2024\n"
+            f"{self.customer.pk},30.00,13,2024\n"
+        )
+
+        with self.assertRaisesMessage(CommandError, "Row 2: paid_month:"):
+            self._import("payments", path)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_malformed_values_are_reported_with_their_row(self):
+        path = self._write(
+            f"customer,amount,paid_month,paid_year\n{self.customer.pk},lots,1,2024\n"
+        )
+
+        with self.assertRaisesMessage(CommandError, "Row 1: amount:"):
+            self._import("payments", path)
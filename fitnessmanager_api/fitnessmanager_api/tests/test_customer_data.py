@@ -0,0 +1,146 @@
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.utils.autoreload import file_changed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api import customer_cache, views
+from fitnessmanager_api.models import Customer
+
+
+class CustomerDataTestCase(TestCase):
+    def setUp(self):
+        customer_cache.get_cache().clear()
+        customer_cache.get_state_cache().clear()
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        Customer.objects.create_user(
+            "member@example.com", "password", first_name="Juan", last_name="Pérez"
+        )
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.staff)}"
+
+    def _put(self, changes):
+        # the cache is invalidated once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put("/customer-data/", changes, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+
+
+class ConditionalGetTests(CustomerDataTestCase):
+    def test_unchanged_data_is_not_modified(self):
+        etag = self.client.get("/customer-data/")["ETag"]
+
+        response = self.client.get("/customer-data/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_old_etag_is_modified_after_the_rows_fill_the_cache(self):
+        # more rows than the local-memory cache holds before it culls entries
+        Customer.objects.bulk_create(
+            Customer(email=f"customer{i}@example.com", first_name="Customer", last_name=str(i))
+            for i in range(400)
+        )
+        self._put({"first_name": "First"})
+        etag = self.client.get("/customer-data/")["ETag"]
+
+        self._put({"first_name": "Second"})
+        response = self.client.get("/customer-data/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        first_names = [row["first_name"]["value"] for row in response.json()["customer_data"]]
+        self.assertIn("Second", first_names)
+
+    def test_compressed_responses_revalidate(self):
+        response = self.client.get("/customer-data/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response["ETag"].startswith("W/"))
+
+        response = self.client.get(
+            "/customer-data/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+
+class CacheInvalidationTests(CustomerDataTestCase):
+    def _get_first_names(self, lang, key="first_name"):
+        response = self.client.get("/customer-data/", {"lang": lang})
+        self.assertEqual(response.status_code, 200)
+        return [row[key]["value"] for row in response.json()["customer_data"]]
+
+    def test_rows_are_served_from_the_cache(self):
+        self._get_first_names("en")
+        hits = customer_cache.stats["hits"]
+
+        self._get_first_names("en")
+
+        self.assertEqual(customer_cache.stats["hits"], hits + 2)
+
+    def test_put_invalidates_every_language(self):
+        self.assertIn("Staff", self._get_first_names("en"))
+        self.assertIn("Staff", self._get_first_names("es", key="Nombre"))
+        self.assertIn("Staff", self._get_first_names("fr"))
+
+        self._put({"first_name": "Changed"})
+
+        self.assertIn("Changed", self._get_first_names("en"))
+        self.assertIn("Changed", self._get_first_names("es", key="Nombre"))
+        self.assertIn("Changed", self._get_first_names("fr"))
+
+    def test_put_changes_the_etag(self):
+        etag = self.client.get("/customer-data/")["ETag"]
+
+        self._put({"first_name": "Changed"})
+
+        response = self.client.get("/customer-data/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_unknown_languages_share_the_english_rows(self):
+        self._get_first_names("en")
+        hits = customer_cache.stats["hits"]
+
+        self._get_first_names("fr")
+
+        self.assertEqual(customer_cache.stats["hits"], hits + 2)
+
+
+class CustomerDataPutTests(CustomerDataTestCase):
+    def test_duplicate_email_is_rejected(self):
+        response = self.client.put(
+            "/customer-data/", {"email": "member@example.com"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], {"email": "Value already in use"})
+
+    def test_too_long_value_is_rejected(self):
+        response = self.client.put(
+            "/customer-data/", {"phone_number": "1" * 50}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], {"phone_number": "Invalid value"})
+
+
+class TranslationCacheTests(TestCase):
+    def setUp(self):
+        views._get_serialization_plan("es", False)
+        views._resolve_translated_key("Nombre", "es")
+
+    def assertCleared(self):
+        self.assertEqual(views._get_serialization_plan.cache_info().currsize, 0)
+        self.assertEqual(views._translated_key_index, {})
+
+    def test_caches_are_cleared_when_a_setting_changes(self):
+        for setting, value in (("LANGUAGES", [("es", "Español")]), ("DATE_FORMAT", "d/m/Y")):
+            with self.subTest(setting=setting):
+                with override_settings(**{setting: value}):
+                    self.assertCleared()
+                views._get_serialization_plan("es", False)
+
+    def test_caches_are_cleared_when_a_catalog_changes(self):
+        file_changed.send(sender=None, file_path=Path("locale/es/LC_MESSAGES/django.mo"))
+
+        self.assertCleared()
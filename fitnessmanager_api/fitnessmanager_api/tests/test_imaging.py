@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from fitnessmanager_api import imaging
+
+
+class EllipseMaskTests(SimpleTestCase):
+    def setUp(self):
+        imaging._get_cached_ellipse_mask.cache_clear()
+
+    def test_thumbnail_masks_are_shared(self):
+        mask = imaging.get_ellipse_mask(imaging.THUMBNAIL_SIZE)
+
+        self.assertIs(imaging.get_ellipse_mask(imaging.THUMBNAIL_SIZE), mask)
+        self.assertEqual(mask.size, imaging.THUMBNAIL_SIZE)
+
+    def test_full_resolution_masks_are_not_cached(self):
+        mask = imaging.get_ellipse_mask((1200, 900))
+
+        self.assertEqual(mask.size, (1200, 900))
+        self.assertEqual(imaging._get_cached_ellipse_mask.cache_info().currsize, 0)
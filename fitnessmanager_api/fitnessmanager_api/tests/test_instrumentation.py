@@ -0,0 +1,86 @@
+import re
+
+from asgiref.sync import iscoroutinefunction
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api.instrumentation import InstrumentationMiddleware
+from fitnessmanager_api.models import Customer
+
+
+class InstrumentationTestCase(TestCase):
+    def setUp(self):
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        self.member = Customer.objects.create_user(
+            "member@example.com", "password", first_name="Juan", last_name="Pérez"
+        )
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.staff)}"}
+
+
+class SamplingTests(InstrumentationTestCase):
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_have_no_server_timing(self):
+        response = self.client.get("/customer-data/", headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_server_timing_counts_the_queries(self):
+        response = self.client.get("/customer-data/", headers=self.headers)
+
+        match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', response["Server-Timing"])
+        self.assertGreater(int(match[1]), 0)
+        self.assertRegex(response["Server-Timing"], r"app;dur=[\d.]+")
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    async def test_asgi_requests_count_the_queries_of_their_threads(self):
+        response = await self.async_client.get("/customer-data/", headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        match = re.search(r'desc="(\d+) queries"', response["Server-Timing"])
+        self.assertGreater(int(match[1]), 0)
+
+    def test_middleware_is_not_adapted_under_asgi(self):
+        async def get_response(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(InstrumentationMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(InstrumentationMiddleware(lambda request: None)))
+
+
+class MetricsTests(InstrumentationTestCase):
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_sampled_requests_are_reported(self):
+        self.client.get("/customer-data/", headers=self.headers)
+        self.client.force_login(self.staff)
+
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response.content.decode(),
+            r'fitnessmanager_db_queries_count\{route="\^customer-data/\?\$"\} [1-9]',
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_is_required_when_configured(self):
+        self.client.force_login(self.staff)
+
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_staff_session_is_required_without_a_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
@@ -0,0 +1,84 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api.membership import refresh_all_memberships, refresh_membership
+from fitnessmanager_api.models import Customer, Payment
+
+
+def _add_months(date, months):
+    period = date.year * 12 + date.month - 1 + months
+    return datetime.date(period // 12, period % 12 + 1, 1)
+
+
+class MembershipTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.customer = Customer.objects.create_user(
+            "member@example.com", "password", first_name="Juan", last_name="Pérez"
+        )
+
+    def _pay(self, *months):
+        # months relative to the current one
+        for offset in months:
+            month = _add_months(self.today, offset)
+            Payment.objects.create(
+                customer=self.customer, amount="30.00", paid_year=month.year, paid_month=month.month
+            )
+
+    def _assert_membership(self, start_offset, end_offset, active):
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.membership_start_date, _add_months(self.today, start_offset))
+        self.assertEqual(
+            self.customer.membership_end_date,
+            _add_months(self.today, end_offset + 1) - datetime.timedelta(days=1),
+        )
+        self.assertEqual(self.customer.active_membership, active)
+
+    def test_consecutive_months_form_one_membership(self):
+        self._pay(-2, -1, 0)
+
+        self._assert_membership(-2, 0, True)
+
+    def test_gap_around_the_current_month_is_not_covered(self):
+        self._pay(-20, 3)
+
+        self._assert_membership(3, 3, False)
+
+    def test_run_covering_the_current_month_wins_over_later_ones(self):
+        self._pay(-1, 0, 5)
+
+        self._assert_membership(-1, 0, True)
+
+    def test_lapsed_membership_keeps_its_last_run(self):
+        self._pay(-6, -5, -3, -2)
+
+        self._assert_membership(-3, -2, False)
+
+    def test_bulk_refresh_matches_the_incremental_one(self):
+        self._pay(-20, -1, 0, 3)
+        Customer.objects.filter(pk=self.customer.pk).update(
+            membership_start_date=None, membership_end_date=None, active_membership=False
+        )
+
+        self.assertEqual(refresh_all_memberships(), 1)
+        self._assert_membership(-1, 0, True)
+        refresh_membership(self.customer.pk)
+        self._assert_membership(-1, 0, True)
+
+    def test_check_in_requires_the_current_month_to_be_paid(self):
+        staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        self._pay(-20, 12)
+
+        response = self.client.post(
+            "/api/check-in/",
+            {"customer": self.customer.pk},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}",
+        )
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,78 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from fitnessmanager_api import derivatives, picture_cache
+
+
+class PictureCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.cache_dir = os.path.join(self.media_root, "profile_picture_cache")
+        settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            PROFILE_PICTURE_CACHE_DIR=self.cache_dir,
+            PROFILE_PICTURE_CACHE_MAX_SIZE=16 * 1024,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # bytes written since the last eviction scan, per process
+        patcher = mock.patch.object(picture_cache, "_written", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _upload(self, name):
+        upload_dir = os.path.join(self.media_root, "customer_profile_pictures")
+        os.makedirs(upload_dir, exist_ok=True)
+        path = os.path.join(upload_dir, name)
+        Image.new("RGB", (64, 48), "red").save(path)
+        return path
+
+
+class EvictionTests(PictureCacheTestCase):
+    def test_pinned_variants_are_never_evicted(self):
+        pinned = picture_cache.put("pinned", b"x" * 1024, "png", pinned=True)
+
+        for index in range(64):
+            picture_cache.put(f"lazy-{index}", b"x" * 1024, "png")
+
+        self.assertEqual(picture_cache.get("pinned", "png"), pinned)
+        lazy_size = sum(
+            os.path.getsize(os.path.join(self.cache_dir, name))
+            for name in os.listdir(self.cache_dir)
+            if name.startswith("lazy-")
+        )
+        self.assertLessEqual(lazy_size, 16 * 1024)
+
+    def test_directory_is_not_scanned_on_every_write(self):
+        with mock.patch.object(picture_cache, "evict") as evict:
+            for index in range(64):
+                picture_cache.put(f"lazy-{index}", b"x" * 1024, "png")
+
+        # once per 1 KiB (1/16 of 16 KiB) written
+        self.assertEqual(evict.call_count, 64)
+        with mock.patch.object(picture_cache, "evict") as evict:
+            for index in range(64):
+                picture_cache.put(f"small-{index}", b"x" * 64, "png")
+        self.assertEqual(evict.call_count, 4)
+
+
+class ReconcileTests(PictureCacheTestCase):
+    def test_generates_pinned_variants_and_removes_orphans(self):
+        source_path = self._upload("member.png")
+        orphan = picture_cache.put("replaced-upload", b"x", "png", pinned=True)
+
+        call_command("reconcile_profile_pictures", workers=1, stdout=io.StringIO())
+
+        self.assertEqual(
+            set(picture_cache.get_pinned_files()), derivatives.get_variant_files(source_path)
+        )
+        self.assertFalse(os.path.exists(orphan))
+        self.assertEqual(derivatives.get_missing_variants(source_path), [])
@@ -0,0 +1,69 @@
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api.models import Customer, MonthlyRevenue, Payment
+
+
+class RevenueReportTests(TestCase):
+    def setUp(self):
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.staff)}"
+
+    def _get_revenue(self, period="2020-01"):
+        response = self.client.get("/api/reports/revenue/", {"from": period, "to": period})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["months"][0]["revenue"]
+
+    def _pay(self, amount, paid_month=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Payment.objects.create(
+                customer=self.staff, amount=amount, paid_year=2020, paid_month=paid_month
+            )
+
+    def test_range_is_capped(self):
+        response = self.client.get("/api/reports/revenue/", {"from": "0001-01", "to": "9999-12"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MonthlyRevenue.objects.exists())
+
+    def test_ten_years_are_allowed(self):
+        response = self.client.get("/api/reports/revenue/", {"from": "2015-01", "to": "2024-12"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["months"]), 120)
+
+    def test_stored_and_new_rollups_are_formatted_alike(self):
+        self._pay("5000")
+        self._pay("410")
+
+        self.assertEqual(self._get_revenue(), "5410.00")
+        self.assertTrue(MonthlyRevenue.objects.exists())
+        self.assertEqual(self._get_revenue(), "5410.00")
+
+    def test_rollups_are_invalidated_once_the_payment_commits(self):
+        payment = self._pay("30")
+        self.assertEqual(self._get_revenue(), "30.00")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            payment.amount = "45"
+            payment.save()
+            self.assertTrue(MonthlyRevenue.objects.exists())
+        for callback in callbacks:
+            callback()
+
+        self.assertFalse(MonthlyRevenue.objects.exists())
+        self.assertEqual(self._get_revenue(), "45.00")
+
+    def test_moved_payments_invalidate_both_months(self):
+        payment = self._pay("30")
+        self._get_revenue()
+        self._get_revenue("2020-02")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.paid_month = 2
+            payment.save()
+
+        self.assertEqual(self._get_revenue(), "0.00")
+        self.assertEqual(self._get_revenue("2020-02"), "30.00")
@@ -0,0 +1,105 @@
+from unittest import skipUnless
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api import routers
+from fitnessmanager_api.models import Customer
+
+
+@skipUnless("replica" in settings.DATABASES, "the replica database is set up for SQLite runs")
+@override_settings(
+    DATABASE_REPLICAS=["replica"],
+    DATABASE_ROUTERS=["fitnessmanager_api.routers.ReplicaRouter"],
+    REPLICA_VIEWS=["customer_search", "admin:*_changelist"],
+)
+class ReplicaRoutingTests(TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        Customer.objects.create_user(
+            "member@example.com", "password", first_name="Juan", last_name="Pérez"
+        )
+        self._add_to_replica(self.staff)
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.staff)}"}
+
+    def _add_to_replica(self, customer):
+        # the staff members authenticate against the replica as well; the
+        # other rows only exist on the primary
+        Customer.objects.using("replica").bulk_create([customer])
+
+    def _get_replica_queries(self, method, path, **kwargs):
+        with CaptureQueriesContext(connections["replica"]) as queries:
+            response = getattr(self.client, method)(path, headers=self.headers, **kwargs)
+        self.assertLess(response.status_code, 400)
+        return len(queries)
+
+    def test_replica_views_read_from_the_replica(self):
+        response = self.client.get("/api/customers/search/", {"q": "Juan"}, headers=self.headers)
+
+        self.assertEqual(response.json(), {"customers": []})
+        self.assertGreater(self._get_replica_queries("get", "/api/customers/search/?q=Juan"), 0)
+
+    def test_other_views_read_from_the_primary(self):
+        self.assertEqual(self._get_replica_queries("get", "/customer-data/"), 0)
+
+    def test_writes_read_from_the_primary_for_a_while(self):
+        self._get_replica_queries(
+            "put", "/customer-data/", data={"notes": "Changed"}, content_type="application/json"
+        )
+
+        self.assertEqual(self._get_replica_queries("get", "/api/customers/search/?q=Juan"), 0)
+
+    def test_other_clients_keep_reading_from_the_replica(self):
+        self._get_replica_queries(
+            "put", "/customer-data/", data={"notes": "Changed"}, content_type="application/json"
+        )
+        other_staff = Customer.objects.create_superuser(
+            "other@example.com", "password", first_name="Other", last_name="Member"
+        )
+        self._add_to_replica(other_staff)
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(other_staff)}"}
+
+        self.assertGreater(self._get_replica_queries("get", "/api/customers/search/?q=Juan"), 0)
+
+    def test_saving_switches_the_request_to_the_primary(self):
+        token = routers._replica.set("replica")
+        try:
+            router = routers.ReplicaRouter()
+            self.assertEqual(router.db_for_write(Customer), "default")
+            self.assertEqual(router.db_for_read(Customer), "replica")
+
+            self.staff.save(update_fields=["notes"])
+
+            self.assertIsNone(router.db_for_read(Customer))
+        finally:
+            routers._replica.reset(token)
+
+    def test_view_names_match_shell_patterns(self):
+        changelist = resolve("/admin/fitnessmanager_api/customer/")
+        change = resolve(f"/admin/fitnessmanager_api/customer/{self.staff.pk}/change/")
+
+        self.assertTrue(routers._is_replica_view(changelist))
+        self.assertFalse(routers._is_replica_view(change))
+        self.assertTrue(routers._is_replica_view(resolve("/api/customers/search/")))
+        self.assertFalse(routers._is_replica_view(resolve("/api/reports/revenue/")))
+
+    async def test_asgi_requests_read_from_the_replica(self):
+        async def get_response(request):
+            return routers._replica.get()
+
+        middleware = routers.ReplicaRoutingMiddleware(get_response)
+        request = AsyncRequestFactory().get("/api/customers/search/", headers=self.headers)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(await middleware(request), "replica")
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api import admin
+from fitnessmanager_api.models import Customer
+from fitnessmanager_api.search import search_customers
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        self.juan = Customer.objects.create_user(
+            "juan@example.com", "password", first_name="Juan", last_name="Garcia"
+        )
+        self.maria = Customer.objects.create_user(
+            "maria@example.com", "password", first_name="Maria", last_name="Garcia"
+        )
+        self.underscore = Customer.objects.create_user(
+            "a_b@example.com", "password", first_name="A_B", last_name="Wildcard"
+        )
+        self.letter = Customer.objects.create_user(
+            "axb@example.com", "password", first_name="AXB", last_name="Wildcard"
+        )
+        self.percent = Customer.objects.create_user(
+            "percent@example.com", "password", first_name="Percent", last_name="Wildcard",
+            phone_number="100%",
+        )
+        self.digits = Customer.objects.create_user(
+            "digits@example.com", "password", first_name="Digits", last_name="Wildcard",
+            phone_number="1000",
+        )
+
+    def _search(self, search_term):
+        return set(search_customers(Customer.objects.all(), search_term))
+
+
+class SearchCustomersTests(SearchTestCase):
+    def test_every_word_has_to_match_a_field(self):
+        self.assertEqual(self._search("garcia"), {self.juan, self.maria})
+        self.assertEqual(self._search("juan garcia"), {self.juan})
+        self.assertEqual(self._search("GARCIA juan@"), {self.juan})
+        self.assertEqual(self._search("juan wildcard"), set())
+
+    def test_like_wildcards_are_matched_literally(self):
+        self.assertEqual(self._search("A_B"), {self.underscore})
+        self.assertEqual(self._search("100%"), {self.percent})
+        self.assertEqual(self._search("%"), {self.percent})
+
+    def test_ranked_results_are_ordered_by_name(self):
+        customers = search_customers(Customer.objects.all(), "garcia", ranked=True)
+
+        self.assertEqual(list(customers), [self.juan, self.maria])
+
+
+class CustomerSearchViewTests(SearchTestCase):
+    def test_staff_are_not_returned(self):
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.staff)}"}
+
+        response = self.client.get("/api/customers/search/", {"q": "e"}, headers=headers)
+
+        ids = [customer["id"] for customer in response.json()["customers"]]
+        self.assertNotIn(self.staff.pk, ids)
+        self.assertIn(self.juan.pk, ids)
+
+
+class AdminSearchTests(SearchTestCase):
+    def test_changelist_searches_with_search_customers(self):
+        self.client.force_login(self.staff)
+
+        with mock.patch.object(admin, "search_customers", wraps=search_customers) as search:
+            response = self.client.get("/admin/fitnessmanager_api/customer/", {"q": "juan garcia"})
+
+        self.assertEqual(response.status_code, 200)
+        search.assert_called_once()
+        self.assertEqual(list(response.context["cl"].result_list), [self.juan])
@@ -0,0 +1,154 @@
+import base64
+import datetime
+import json
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fitnessmanager_api.models import Customer, Payment
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.staff = Customer.objects.create_superuser(
+            "staff@example.com", "password", first_name="Staff", last_name="Member"
+        )
+        self.customers = [
+            Customer.objects.create_user(
+                f"member{i}@example.com", "password", first_name="Member", last_name=str(i)
+            )
+            for i in range(3)
+        ]
+        self.payment = Payment.objects.create(
+            customer=self.customers[0], amount="30.00", paid_year=2024, paid_month=1
+        )
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.staff)}"
+
+    def _sync(self, since=None, limit=None, status=200):
+        params = {}
+        if since is not None:
+            params["since"] = since
+        if limit is not None:
+            params["limit"] = limit
+        response = self.client.get("/api/sync/", params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def _sync_all(self, since=None, limit=None):
+        pages = []
+        while True:
+            page = self._sync(since, limit)
+            pages.append(page)
+            since = page["cursor"]
+            if not page["has_more"]:
+                return pages
+
+    def _get_ids(self, pages, name):
+        return [row["id"] for page in pages for row in page[name]]
+
+    def test_first_sync_pages_through_every_row(self):
+        pages = self._sync_all(limit=2)
+
+        self.assertGreater(len(pages), 2)
+        self.assertEqual(
+            sorted(self._get_ids(pages, "customers")),
+            sorted(Customer.objects.values_list("id", flat=True)),
+        )
+        self.assertEqual(self._get_ids(pages, "payments"), [self.payment.pk])
+
+    def test_changes_are_returned_once(self):
+        cursor = self._sync_all()[-1]["cursor"]
+        customer = self.customers[1]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.notes = "Changed"
+            customer.save()
+        page = self._sync(cursor)
+
+        self.assertEqual([row["notes"] for row in page["customers"]], ["Changed"])
+        self.assertFalse(page["has_more"])
+        self.assertEqual(self._sync(page["cursor"])["customers"], [])
+
+    def test_changes_are_paginated(self):
+        cursor = self._sync_all()[-1]["cursor"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for customer in self.customers:
+                customer.save()
+        pages = self._sync_all(cursor, limit=2)
+
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(
+            sorted(self._get_ids(pages, "customers")),
+            sorted(customer.pk for customer in self.customers),
+        )
+
+    def test_deletions_are_reported(self):
+        cursor = self._sync_all()[-1]["cursor"]
+        payment_id = self.payment.pk
+        customer_id = self.customers[2].pk
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payment.delete()
+            self.customers[2].delete()
+        pages = self._sync_all(cursor)
+
+        deleted = pages[-1]["deleted"]
+        self.assertEqual(deleted["payments"], [payment_id])
+        self.assertEqual(deleted["customers"], [customer_id])
+        # the membership of the payment's customer was refreshed
+        self.assertEqual(self._get_ids(pages, "customers"), [self.customers[0].pk])
+
+    def test_rows_are_returned_in_commit_order(self):
+        customer = self.customers[1]
+        with self.captureOnCommitCallbacks() as callbacks:
+            # saved, and stamped, before the cursor below is taken
+            customer.notes = "Slow transaction"
+            customer.save()
+            cursor = self._sync_all()[-1]["cursor"]
+        for callback in callbacks:
+            callback()
+
+        page = self._sync(cursor)
+
+        self.assertEqual([row["notes"] for row in page["customers"]], ["Slow transaction"])
+
+    def test_bulk_updates_are_logged(self):
+        cursor = self._sync_all()[-1]["cursor"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                "/api/customers/bulk/",
+                [{"id": self.customers[1].pk, "changes": {"notes": "Bulk"}}],
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self._get_ids(self._sync_all(cursor), "customers"), [self.customers[1].pk])
+
+    @override_settings(SYNC_CHANGE_RETENTION_DAYS=30)
+    def test_old_cursors_expire(self):
+        at = timezone.now() - datetime.timedelta(days=31)
+        since = _encode({"change": 0, "at": at.isoformat()})
+
+        self._sync(since, status=410)
+
+    def test_malformed_cursors_are_rejected(self):
+        now = timezone.now()
+        for since in [
+            "not base64!",
+            base64.urlsafe_b64encode(b"not json").decode(),
+            _encode([1, 2]),
+            _encode({"change": 1}),
+            _encode({"change": "one", "at": now.isoformat()}),
+            _encode({"change": 1, "at": now.replace(tzinfo=None).isoformat()}),
+            _encode({"change": 1, "at": now.isoformat(), "attendance": 1}),
+        ]:
+            with self.subTest(since=since):
+                self._sync(since, status=400)
+
+
+def _encode(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
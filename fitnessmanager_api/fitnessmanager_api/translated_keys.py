@@ -0,0 +1,16 @@
+from .models import Customer
+
+
+# The keys of the API payloads and the CSV headers: field names in English,
+# the capitalized verbose names of the fields in any other language.
+
+
+def get_translated_key(field_name, language, model=Customer):
+    # translated in the active language, which callers set to "language"
+    if language == "en":
+        key = field_name
+    else:
+        key = str(model._meta.get_field(field_name).verbose_name)
+        key = key[0].upper() + key[1:]  # capitalize
+
+    return key
@@ -18,22 +18,55 @@ from django.contrib import admin
 from django.urls import path
 from django.conf import settings
 from django.conf.urls import include
-from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from django.urls import re_path
-from .views import CustomerData, GetProfilePicture
+from .instrumentation import metrics
+from .authentication import (
+    CustomerTokenObtainPairSerializer,
+    CustomerTokenRefreshSerializer,
+)
+from .views import (
+    BulkCustomerUpdate,
+    CheckIn,
+    CustomerData,
+    CustomerSearch,
+    CustomersInArrears,
+    GetProfilePicture,
+    ProtectedMedia,
+    RevenueReport,
+    Sync,
+)
+
+if settings.ASYNC_VIEWS:
+    from .async_views import (
+        AsyncCustomerData as CustomerData,
+        AsyncGetProfilePicture as GetProfilePicture,
+    )
 
 urlpatterns = [
     path('grappelli/', include('grappelli.urls')),  # grappelli URLS
     path("admin/", admin.site.urls),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path(
+        'api/token/',
+        TokenObtainPairView.as_view(serializer_class=CustomerTokenObtainPairSerializer),
+        name='token_obtain_pair',
+    ),
+    path(
+        'api/token/refresh/',
+        TokenRefreshView.as_view(serializer_class=CustomerTokenRefreshSerializer),
+        name='token_refresh',
+    ),
     path("api/profile_picture/", GetProfilePicture.as_view(), name="profile_picture"),
+    # replaces static(), which served every file under MEDIA_ROOT to anyone
+    path("media/<path:name>", ProtectedMedia.as_view(), name="media"),
     re_path(r'^customer-data/?$', CustomerData.as_view(), name='customer_data'),
+    path("api/arrears/", CustomersInArrears.as_view(), name="customers_in_arrears"),
+    re_path(r'^api/customers/search/?$', CustomerSearch.as_view(), name='customer_search'),
+    re_path(r'^api/reports/revenue/?$', RevenueReport.as_view(), name='revenue_report'),
+    path("metrics", metrics, name="metrics"),
+    path("api/customers/bulk/", BulkCustomerUpdate.as_view(), name="customer_bulk_update"),
+    path("api/check-in/", CheckIn.as_view(), name="check_in"),
+    re_path(r'^api/sync/?$', Sync.as_view(), name='sync'),
 
 ]
-
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
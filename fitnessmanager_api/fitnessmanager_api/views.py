@@ -1,17 +1,56 @@
 import datetime
-
-import dateutil.parser
-from django.http import JsonResponse
-from django.utils.translation import activate
+import functools
+import itertools
+import mimetypes
+
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.translation import activate, override
 from django.utils import formats
-from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
-from django.http import HttpResponse
-from PIL import Image, ImageOps, ImageDraw
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
 from django.db.models.fields.reverse_related import ManyToOneRel
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.autoreload import file_changed
+
+
+from . import (
+    attendance,
+    customer_cache,
+    imaging,
+    instrumentation,
+    media,
+    picture_cache,
+    rendering,
+    reports,
+    sync,
+)
+from .models import Customer
+from .search import search_customers
+from .translated_keys import get_translated_key
 
 
-from .models import Customer
+# upper bound for the "limit" query parameter of the paginated customer list
+MAX_PAGE_SIZE = 1000
+
+# number of rows fetched per round trip when streaming the customer list
+STREAM_CHUNK_SIZE = 2000
+
+# number of rows written per UPDATE statement by the bulk customer update
+BULK_UPDATE_BATCH_SIZE = 500
+
+# upper bound for the number of matches returned by the customer search
+MAX_SEARCH_RESULTS = 50
+
+# upper bound for the months covered by one revenue report; every closed
+# month without a rollup gets one stored by the request
+MAX_REPORT_MONTHS = 120
 
 
 def translate_boolean(value, language):
@@ -27,61 +66,597 @@ class CustomerData(APIView):
     ]
 
     def get(self, request, *args, **kwargs):
-        language = request.GET.get("lang", "en")  # default to English
-        activate(language)
-        all_fields = request.GET.get("all", "false").lower() == "true"
+        return _get_customer_data(request)
 
-        customer_data = Customer.objects.values()
-        translated_customer_data = []
-
-        fields_to_return = _get_fields_to_return(all_fields)
+    def put(self, request, *args, **kwargs):
+        language = _get_language(request)
+        activate(language)
+        return _update_customer_data(request.user, request.data, language)
+
+
+def _get_language(request):
+    # "lang" narrowed down to a served language, English by default. Rows and
+    # serialization plans are cached per language, so an arbitrary code must
+    # not get entries of its own that invalidation does not know about
+    language = request.GET.get("lang", "en").lower().replace("_", "-")
+    languages = customer_cache.get_languages()
+    if language not in languages:
+        language = language.split("-")[0]
+    return language if language in languages else "en"
+
+
+def _get_customer_data(request):
+    language = _get_language(request)
+    activate(language)
+    all_fields = request.GET.get("all", "false").lower() == "true"
+    stream = request.GET.get("stream", "false").lower() == "true"
+    # field metadata once, rows as plain value arrays
+    columnar = request.GET.get("layout") == "columnar"
+
+    plan = _get_serialization_plan(language, all_fields)
+    customer_data = Customer.objects.values().order_by("id")
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            customer_data = customer_data.filter(id__gt=int(cursor))
+        except ValueError:
+            return JsonResponse({"message": "Invalid cursor"}, status=400)
+
+    if stream:
+        rows = customer_data.values_list(*_get_plan_fields(plan)).iterator(
+            chunk_size=STREAM_CHUNK_SIZE
+        )
+        return StreamingHttpResponse(
+            _stream_customer_data(rows, plan, language, columnar),
+            content_type="application/json",
+        )
+
+    version, last_modified, generation = customer_cache.get_state()
+    etag = customer_cache.get_etag(version, request.GET)
+    if _is_not_modified(request, etag, last_modified):
+        return _with_validators(HttpResponseNotModified(), etag, last_modified)
+
+    def load_rows(ids):
+        rows = list(
+            Customer.objects.filter(id__in=ids).values_list("id", *_get_plan_fields(plan))
+        )
+        return dict(
+            zip((row[0] for row in rows), _serialize_rows([row[1:] for row in rows], plan))
+        )
+
+    customer_ids = customer_data.values_list("id", flat=True)
+
+    limit = request.GET.get("limit")
+    if limit is None:
+        translated_customer_data = customer_cache.get_rows(
+            list(customer_ids), language, all_fields, generation, load_rows
+        )
+        return _with_validators(
+            rendering.JsonResponse(_get_payload(translated_customer_data, plan, columnar)),
+            etag,
+            last_modified,
+        )
+
+    try:
+        limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({"message": "Invalid limit"}, status=400)
+
+    page_ids = list(customer_ids[: limit + 1])
+    has_more = len(page_ids) > limit
+    page_ids = page_ids[:limit]
+    translated_customer_data = customer_cache.get_rows(
+        page_ids, language, all_fields, generation, load_rows
+    )
+
+    payload = _get_payload(translated_customer_data, plan, columnar)
+    payload["next_cursor"] = page_ids[-1] if has_more else None
+    return _with_validators(rendering.JsonResponse(payload), etag, last_modified)
+
+
+def _update_customer_data(customer, customer_data, language):
+    if not isinstance(customer_data, dict):
+        return JsonResponse({"message": "Expected an object of changes"}, status=400)
+
+    values, _, errors = _resolve_changes(customer_data, language)
+    if not errors:
+        errors = _find_unique_conflicts({customer.pk: values}, language).get(customer.pk)
+    if errors:
+        return JsonResponse({"message": "Invalid customer data", "errors": errors}, status=400)
+
+    for field_name, value in values.items():
+        setattr(customer, field_name, value)
+
+    try:
+        # auto_now only reaches the database when it is listed in update_fields
+        customer.save(update_fields=[*values, "updated_at"])
+    except IntegrityError:
+        # another request took the same unique value since the check
+        return JsonResponse({"message": "Conflicting update, please retry"}, status=409)
+
+    return JsonResponse({"message": "Customer data updated successfully"})
+
+
+class BulkCustomerUpdate(APIView):
+    permission_classes = [
+        IsAdminUser,
+    ]
 
-        for data in customer_data:
-            translated_data = {}
-            for field_name in fields_to_return:
-                if field_name not in data:
-                    continue
+    def patch(self, request, *args, **kwargs):
+        language = _get_language(request)
+        activate(language)
 
-                key = _get_translated_key(field_name, language)
-                value, value_type = _get_value_and_type(
-                    data[field_name], language
-                )
+        if not isinstance(request.data, list):
+            return JsonResponse({"message": "Expected a list of changes"}, status=400)
 
-                translated_data[key] = {
-                    "value": value if value else " - ",
-                    "_type": value_type,
-                    "editable": _is_key_editable(field_name),
-                }
+        changes_by_id = {}
+        row_errors = []
+        seen_ids = set()
+        duplicate_ids = set()
+        for item in request.data:
+            if not isinstance(item, dict) or not isinstance(item.get("changes"), dict):
+                row_errors.append({"id": None, "errors": {"changes": "Invalid item"}})
+                continue
+            try:
+                customer_id = int(item.get("id"))
+            except (TypeError, ValueError):
+                row_errors.append({"id": item.get("id"), "errors": {"id": "Invalid id"}})
+                continue
+            if customer_id in seen_ids:
+                # which of the items would win is not for the server to guess
+                row_errors.append({"id": customer_id, "errors": {"id": "Duplicate id"}})
+                duplicate_ids.add(customer_id)
+                continue
+            seen_ids.add(customer_id)
+
+            values, skipped, errors = _resolve_changes(item["changes"], language)
+            errors.update({key: "Field is not editable" for key in skipped})
+            if errors:
+                row_errors.append({"id": customer_id, "errors": errors})
+            elif values:
+                changes_by_id[customer_id] = values
+
+        for customer_id in duplicate_ids:
+            if changes_by_id.pop(customer_id, None) is not None:
+                row_errors.append({"id": customer_id, "errors": {"id": "Duplicate id"}})
+
+        for customer_id, errors in _find_unique_conflicts(changes_by_id, language).items():
+            row_errors.append({"id": customer_id, "errors": errors})
+            del changes_by_id[customer_id]
+
+        updated_ids = []
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                customers = Customer.objects.select_for_update().in_bulk(list(changes_by_id))
+
+                # bulk_update writes the same columns for every object it gets,
+                # so customers are grouped by the set of fields that changed
+                batches = {}
+                for customer_id, values in changes_by_id.items():
+                    customer = customers.get(customer_id)
+                    if customer is None:
+                        row_errors.append(
+                            {"id": customer_id, "errors": {"id": "Customer not found"}}
+                        )
+                        continue
+                    for field_name, value in values.items():
+                        setattr(customer, field_name, value)
+                    customer.updated_at = now
+                    batches.setdefault((*sorted(values), "updated_at"), []).append(customer)
+                    updated_ids.append(customer_id)
+
+                for fields, batch in batches.items():
+                    Customer.objects.bulk_update(
+                        batch, fields, batch_size=BULK_UPDATE_BATCH_SIZE
+                    )
+
+                # bulk_update sends no post_save, so the cached rows and
+                # authenticated users are dropped and the changes are logged
+                # for sync here
+                from .authentication import forget_user
+
+                for customer_id in updated_ids:
+                    transaction.on_commit(
+                        functools.partial(customer_cache.invalidate_customer, customer_id)
+                    )
+                    transaction.on_commit(functools.partial(forget_user, customer_id))
+                sync.record_changes(Customer, updated_ids)
+        except IntegrityError:
+            # another request took one of the unique values since the check
+            return JsonResponse({"message": "Conflicting update, please retry"}, status=409)
+
+        return JsonResponse({"updated": updated_ids, "errors": row_errors})
+
+
+class CustomersInArrears(APIView):
+    permission_classes = [
+        IsAdminUser,
+    ]
 
-            translated_customer_data.append(translated_data)
+    def get(self, request, *args, **kwargs):
+        today = timezone.localdate()
+        try:
+            start = _parse_period(request.GET.get("from"), (today.year, today.month))
+            end = _parse_period(request.GET.get("to"), start)
+            cursor = int(request.GET.get("cursor", 0))
+            limit = min(max(int(request.GET.get("limit", 100)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({"message": "Invalid query parameters"}, status=400)
+
+        customers = (
+            Customer.objects.in_arrears(start, end)
+            .filter(id__gt=cursor)
+            .order_by("id")
+            .values("id", "first_name", "last_name", "email", "phone_number")
+        )
+        page = list(customers[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        return rendering.JsonResponse(
+            {
+                "customers": page,
+                "next_cursor": page[-1]["id"] if has_more else None,
+            }
+        )
+
+
+class RevenueReport(APIView):
+    permission_classes = [
+        IsAdminUser,
+    ]
 
-        return JsonResponse({"customer_data": translated_customer_data})
+    def get(self, request, *args, **kwargs):
+        today = timezone.localdate()
+        try:
+            end = _parse_period(request.GET.get("to"), (today.year, today.month))
+            # defaults to the twelve months up to and including "to"
+            default_start = (end[0] - 1, end[1] + 1) if end[1] < 12 else (end[0], 1)
+            start = _parse_period(request.GET.get("from"), default_start)
+        except ValueError:
+            return JsonResponse({"message": "Invalid query parameters"}, status=400)
+
+        if start > end:
+            return JsonResponse({"message": "Invalid query parameters"}, status=400)
+        months = (end[0] - start[0]) * 12 + end[1] - start[1] + 1
+        if months > MAX_REPORT_MONTHS:
+            return JsonResponse(
+                {"message": f"A report covers at most {MAX_REPORT_MONTHS} months"}, status=400
+            )
+
+        return rendering.JsonResponse(reports.get_revenue_report(start, end))
+
+
+class CustomerSearch(APIView):
+    permission_classes = [
+        IsAdminUser,
+    ]
 
-    def put(self, request, *args, **kwargs):
-        language = self._get_language(request)
-        customer_data = request.data
-        customer = request.user
+    def get(self, request, *args, **kwargs):
+        search_term = request.GET.get("q", "").strip()
+        try:
+            limit = min(max(int(request.GET.get("limit", 10)), 1), MAX_SEARCH_RESULTS)
+        except ValueError:
+            return JsonResponse({"message": "Invalid limit"}, status=400)
+
+        if not search_term:
+            return JsonResponse({"customers": []})
+
+        customers = search_customers(
+            Customer.objects.filter(is_staff=False), search_term, ranked=True
+        ).values(
+            "id",
+            "first_name",
+            "last_name",
+            "email",
+            "phone_number",
+            "active_membership",
+            "membership_end_date",
+        )
+
+        return rendering.JsonResponse({"customers": list(customers[:limit])})
+
+
+class Sync(APIView):
+    permission_classes = [
+        IsAdminUser,
+    ]
 
-        for key, value in customer_data.items():
-            field_name = _get_field_name_from_key(key, language)
+    def get(self, request, *args, **kwargs):
+        try:
+            positions = sync.parse_cursor(request.GET.get("since"))
+            limit = min(
+                max(int(request.GET.get("limit", sync.DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE
+            )
+        except ValueError:
+            return JsonResponse({"message": "Invalid query parameters"}, status=400)
 
-            if not _is_key_editable(field_name):
-                continue
+        try:
+            changes = sync.get_changes(positions, limit)
+        except sync.CursorExpired:
+            return JsonResponse({"message": "Cursor expired, sync without since"}, status=410)
 
-            if hasattr(customer, field_name):
+        return rendering.JsonResponse(changes)
 
-                if customer._meta.get_field(field_name).get_internal_type() == "DateField":
-                    value = dateutil.parser.parse(value).date()
-                setattr(customer, field_name, value)
 
-        customer.save()
+class CheckIn(APIView):
+    # used by the door scanner, which signs in with a staff account
+    permission_classes = [
+        IsAdminUser,
+    ]
 
-        return JsonResponse({"message": "Customer data updated successfully"})
+    def post(self, request, *args, **kwargs):
+        try:
+            customer_id = int(request.data.get("customer"))
+        except (TypeError, ValueError):
+            return JsonResponse({"message": "Invalid customer"}, status=400)
+
+        # a single primary key lookup; the membership dates are kept up to
+        # date from the payments by membership.py
+        customer = (
+            Customer.objects.filter(pk=customer_id, is_active=True)
+            .values("first_name", "last_name", "membership_start_date", "membership_end_date")
+            .first()
+        )
+        if customer is None:
+            return JsonResponse({"message": "Unknown customer"}, status=404)
+
+        today = timezone.localdate()
+        start_date = customer["membership_start_date"]
+        end_date = customer["membership_end_date"]
+        if start_date is None or end_date is None or not start_date <= today <= end_date:
+            return JsonResponse(
+                {"message": "No active membership", "membership_end_date": end_date},
+                status=403,
+            )
+
+        attendance.record_check_in(customer_id, timezone.now())
+        return JsonResponse(
+            {
+                "customer": f'{customer["first_name"]} {customer["last_name"]}',
+                "membership_end_date": end_date,
+            },
+            status=201,
+        )
+
+
+def _is_not_modified(request, etag, last_modified):
+    if request.headers.get("If-None-Match") is not None:
+        return _etag_matches(request, etag)
+
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return if_modified_since is not None and int(last_modified) <= if_modified_since
+
+
+def _etag_matches(request, etag):
+    # weak comparison, as If-None-Match requires: compressed responses carry
+    # the weakened W/"..." form of the ETag the view set
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if "*" in if_none_match:
+        return True
+    return _strip_weak(etag) in {_strip_weak(value) for value in if_none_match}
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _with_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _parse_period(value, default):
+    # "YYYY-MM" -> (year, month)
+    if not value:
+        return default
+
+    year, _, month = value.partition("-")
+    year, month = int(year), int(month)
+    if not 1 <= month <= 12:
+        raise ValueError(value)
+    return year, month
+
+
+def _serialize_rows(rows, plan):
+    # rows are value tuples in plan order; they are transposed so that every
+    # column is formatted in a single pass by its precompiled formatter
+    if not rows:
+        return []
+
+    keys = [key for _, key, _, _ in plan]
+    columns = [
+        format_column(column) for (_, _, format_column, _), column in zip(plan, zip(*rows))
+    ]
+    return [dict(zip(keys, cells)) for cells in zip(*columns)]
+
+
+def _get_payload(rows, plan, columnar):
+    if not columnar:
+        return {"customer_data": rows}
+
+    return {
+        "fields": [metadata for _, _, _, metadata in plan],
+        "rows": _get_value_arrays(rows, plan),
+    }
+
+
+def _get_value_arrays(rows, plan):
+    keys = [key for _, key, _, _ in plan]
+    return [[row[key]["value"] for key in keys] for row in rows]
+
+
+def _stream_customer_data(rows, plan, language, columnar=False):
+    # the generator is consumed after the view has returned, so the language
+    # has to be re-activated for the duration of the iteration
+    with override(language):
+        if columnar:
+            fields = rendering.dumps([metadata for _, _, _, metadata in plan])
+            yield b'{"fields": ' + fields + b', "rows": ['
+        else:
+            yield b'{"customer_data": ['
+        separator = b""
+        while True:
+            chunk = list(itertools.islice(rows, STREAM_CHUNK_SIZE))
+            if not chunk:
+                break
+            serialized = _serialize_rows(chunk, plan)
+            if columnar:
+                serialized = _get_value_arrays(serialized, plan)
+            for row in serialized:
+                yield separator + rendering.dumps(row)
+                separator = b","
+        yield b"]}"
+
+
+def _get_plan_fields(plan):
+    return [field_name for field_name, _, _, _ in plan]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_serialization_plan(language, all_fields):
+    # resolves once per (language, all_fields) everything that does not depend
+    # on the row: output key, column formatter and metadata of each field
+    #
+    # only concrete fields show up in Customer.objects.values()
+    concrete_fields = {field.attname for field in Customer._meta.concrete_fields}
+
+    plan = []
+    for field_name in _get_fields_to_return(all_fields):
+        if field_name not in concrete_fields:
+            continue
 
-    def _get_language(self, request):
-        language = request.GET.get("lang", "en")
-        activate(language)
-        return language
+        internal_type = Customer._meta.get_field(field_name).get_internal_type()
+        key = get_translated_key(field_name, language)
+        editable = _is_key_editable(field_name)
+        plan.append(
+            (
+                field_name,
+                key,
+                _get_column_formatter(internal_type, language, editable),
+                {
+                    "key": key,
+                    "_type": _FIELD_TYPES.get(internal_type, "str"),
+                    "editable": editable,
+                },
+            )
+        )
+
+    return tuple(plan)
+
+
+def _get_column_formatter(internal_type, language, editable):
+    # each formatter must produce exactly the cells the per-value helpers
+    # (_get_value_and_type) would produce. Cells that only depend on the value
+    # (None, booleans) are built once and shared by every row
+    none_cell = {"value": " - ", "_type": "NoneType", "editable": editable}
+
+    if internal_type == "BooleanField":
+        cells = {
+            None: none_cell,
+            True: {
+                "value": translate_boolean(True, language),
+                "_type": "bool",
+                "editable": editable,
+            },
+            False: {
+                "value": translate_boolean(False, language),
+                "_type": "bool",
+                "editable": editable,
+            },
+        }
+
+        def format_booleans(column):
+            return [cells[value] for value in column]
+
+        return format_booleans
+
+    if internal_type in ("DateField", "DateTimeField"):
+        to_text = _compile_date_format("Y-m-d" if language == "en" else "d.m.Y")
+
+        def format_dates(column):
+            return [
+                none_cell
+                if value is None
+                else {"value": to_text(value), "_type": "date", "editable": editable}
+                for value in column
+            ]
+
+        return format_dates
+
+    empty_cells = {}
+
+    def format_plain(column):
+        cells = []
+        for value in column:
+            if value is None:
+                cells.append(none_cell)
+            elif value:
+                cells.append(
+                    {"value": value, "_type": type(value).__name__, "editable": editable}
+                )
+            else:
+                # "", 0, Decimal("0.00") ... all render as " - "
+                value_type = type(value).__name__
+                cell = empty_cells.get(value_type)
+                if cell is None:
+                    cell = empty_cells[value_type] = {
+                        "value": " - ",
+                        "_type": value_type,
+                        "editable": editable,
+                    }
+                cells.append(cell)
+        return cells
+
+    return format_plain
+
+
+# "_type" announced for a column in the columnar layout, by internal type
+_FIELD_TYPES = {
+    "AutoField": "int",
+    "BigAutoField": "int",
+    "BooleanField": "bool",
+    "DateField": "date",
+    "DateTimeField": "date",
+    "DecimalField": "Decimal",
+    "IntegerField": "int",
+    "PositiveIntegerField": "int",
+}
+
+
+# Django date format characters that map directly onto str.format fields
+_DATE_FORMAT_FIELDS = {
+    "d": "{0.day:02d}",
+    "j": "{0.day}",
+    "m": "{0.month:02d}",
+    "n": "{0.month}",
+    "Y": "{0.year:04d}",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_date_format(date_format):
+    # turns e.g. "d.m.Y" into "{0.day:02d}.{0.month:02d}.{0.year:04d}" once,
+    # instead of having formats.date_format parse the format for every value.
+    # Like date_format, the date parts of aware datetimes are taken as they
+    # are, without conversion to the current time zone
+    pattern = []
+    for char in date_format:
+        if char in _DATE_FORMAT_FIELDS:
+            pattern.append(_DATE_FORMAT_FIELDS[char])
+        elif char.isalpha() or char == "\\":
+            # anything else is left to Django
+            return functools.partial(
+                formats.date_format, format=date_format, use_l10n=True
+            )
+        else:
+            pattern.append(char.replace("{", "{{").replace("}", "}}"))
+
+    return "".join(pattern).format
 
 
 def _get_fields_to_return(all_fields):
@@ -105,30 +680,60 @@ def _get_fields_to_return(all_fields):
     return fields
 
 
-def _get_translated_key(field_name, language):
-    if language == "en":
-        key = field_name
-    else:
-        key = str(Customer._meta.get_field(field_name).verbose_name)
-        key = key[0].upper() + key[1:]  # capitalize
+# {language: {translated_key: (field_name, internal_type)}}, built lazily
+_translated_key_index = {}
 
-    return key
 
+def _resolve_translated_key(key, language):
+    index = _translated_key_index.get(language)
+    if index is None:
+        index = _translated_key_index[language] = _build_translated_key_index(language)
 
-def _get_field_name_from_key(key, language):
-    if language == "en":
-        return key
+    return index.get(key, (None, None))
 
-    for field in Customer._meta.get_fields():
-        if isinstance(field, ManyToOneRel):
-            continue
 
-        translated_key = str(field.verbose_name)
-        translated_key = translated_key[0].upper() + translated_key[1:]
-        if translated_key == key:
-            return field.name
-    return None
+def _build_translated_key_index(language):
+    index = {}
+    with override(language):
+        for field in Customer._meta.get_fields():
+            if isinstance(field, ManyToOneRel):
+                continue
+
+            if language == "en":
+                translated_key = field.name
+            else:
+                translated_key = str(field.verbose_name)
+                translated_key = translated_key[0].upper() + translated_key[1:]
+
+            index.setdefault(translated_key, (field.name, field.get_internal_type()))
+
+    return index
+
+
+# the serialization plans hold translated keys and formatters as well
+def _clear_translation_caches():
+    _translated_key_index.clear()
+    _get_serialization_plan.cache_clear()
+
+
+@receiver(setting_changed)
+def _reset_translation_caches_on_setting_change(setting, **kwargs):
+    if setting in (
+        "LANGUAGES",
+        "LANGUAGE_CODE",
+        "LOCALE_PATHS",
+        "DATE_FORMAT",
+        "DATETIME_FORMAT",
+        "FORMAT_MODULE_PATH",
+    ):
+        _clear_translation_caches()
+
 
+@receiver(file_changed)
+def _reset_translation_caches_on_catalog_change(file_path, **kwargs):
+    # must not return a value: a truthy result would stop the autoreloader
+    if file_path.suffix == ".mo":
+        _clear_translation_caches()
 
 
 def _get_value_and_type(value, language):
@@ -144,9 +749,10 @@ def _get_value_and_type(value, language):
     return value, value_type
 
 
-def _is_key_editable(key: str) -> bool:
-    uneditable_fields = [
+UNEDITABLE_FIELDS = frozenset(
+    [
         "id",
+        "password",
         "active_membership",
         "passport_number",
         "membership_start_date",
@@ -158,8 +764,82 @@ def _is_key_editable(key: str) -> bool:
         "membership_start_date",
         "membership_end_date",
         "profile_picture",
+        "updated_at",
+        "groups",
+        "user_permissions",
     ]
-    return key not in uneditable_fields
+)
+
+
+def _is_key_editable(key: str) -> bool:
+    return key not in UNEDITABLE_FIELDS
+
+
+def _resolve_changes(changes, language):
+    # translated {key: value} -> ({field_name: value}, skipped keys, {key: error});
+    # keys that are unknown or not editable are skipped rather than rejected
+    values = {}
+    skipped = []
+    errors = {}
+    for key, value in changes.items():
+        field_name, internal_type = _resolve_translated_key(key, language)
+
+        if field_name is None or not _is_key_editable(field_name):
+            skipped.append(key)
+            continue
+
+        field = Customer._meta.get_field(field_name)
+        try:
+            if internal_type == "DateField":
+                # dateutil is slow to import and only needed here
+                import dateutil.parser
+
+                value = dateutil.parser.parse(value).date() if value else None
+            else:
+                value = field.to_python(value)
+            # max_length, max_digits, email format; the columns accept NULL,
+            # so empty values stay allowed as before
+            if value not in field.empty_values:
+                field.run_validators(value)
+        except (TypeError, ValueError, OverflowError, ValidationError):
+            errors[key] = "Invalid value"
+            continue
+
+        values[field_name] = value
+
+    return values, skipped, errors
+
+
+def _find_unique_conflicts(changes_by_id, language):
+    # {customer id: {key: error}} for unique values that another customer
+    # already holds, or that several customers of the same request would
+    # get; one query per unique field, instead of an IntegrityError that
+    # aborts the whole batch
+    conflicts = {}
+    for field in Customer._meta.concrete_fields:
+        if not field.unique or field.primary_key:
+            continue
+
+        claims = {}
+        for customer_id, values in changes_by_id.items():
+            value = values.get(field.name)
+            if value not in field.empty_values:
+                claims.setdefault(value, []).append(customer_id)
+        if not claims:
+            continue
+
+        holders = dict(
+            Customer.objects.filter(**{f"{field.name}__in": list(claims)}).values_list(
+                field.name, "pk"
+            )
+        )
+        key = get_translated_key(field.name, language)
+        for value, customer_ids in claims.items():
+            if len(customer_ids) > 1 or holders.get(value, customer_ids[0]) != customer_ids[0]:
+                for customer_id in customer_ids:
+                    conflicts.setdefault(customer_id, {})[key] = "Value already in use"
+
+    return conflicts
 
 
 class GetProfilePicture(APIView):
@@ -168,44 +848,67 @@ class GetProfilePicture(APIView):
     ]
 
     def get(self, request, *args, **kwargs):
-        as_thumbnail = request.GET.get("as_thumbnail", "false").lower() == "true"
-        shape = request.GET.get("shape", "original")
+        try:
+            transform = imaging.parse_transform(request.GET)
+        except ValueError as exc:
+            return JsonResponse({"message": str(exc)}, status=400)
 
-        customer = request.user
-        profile_picture_path = customer.profile_picture.path
-        img = Image.open(profile_picture_path)
+        return serve_profile_picture(request, request.user, transform)
 
-        if as_thumbnail:
-            img.thumbnail((128, 128))
 
-        if shape == "oval":
-            img = self.make_oval_image(img)
-        elif shape == "round":
-            img = self.make_round_image(img)
-
-        response = HttpResponse(
-            content_type="image/png"
-        )  # Change the content type to image/png
-        img.save(response, "PNG")  # Save the image as PNG instead of JPEG
+class ProtectedMedia(APIView):
+    # uploaded files, served to their owner and to staff only
+    permission_classes = [
+        IsAuthenticated,
+    ]
 
+    def get(self, request, name, *args, **kwargs):
+        owners = Customer.objects.filter(profile_picture=name)
+        if not request.user.is_staff:
+            owners = owners.filter(pk=request.user.pk)
+        if not owners.exists():
+            return JsonResponse({"message": "Not found"}, status=404)
+
+        path = default_storage.path(name)
+        try:
+            etag = media.get_file_etag(path)
+        except FileNotFoundError:
+            return JsonResponse({"message": "Not found"}, status=404)
+
+        if _etag_matches(request, etag):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+        else:
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            response = media.send_file(request, path, content_type, etag)
+
+        response["Cache-Control"] = "private, no-cache"
         return response
 
-    @staticmethod
-    def make_oval_image(img):
-        size = (img.width, img.height)
-        mask = Image.new("L", size, 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0) + size, fill=255)
-        output = ImageOps.fit(img, mask.size, centering=(0.5, 0.5))
-        output.putalpha(mask)
-        return output
-
-    @staticmethod
-    def make_round_image(img):
-        size = min(img.width, img.height)
-        mask = Image.new("L", (size, size), 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0, size, size), fill=255)
-        output = ImageOps.fit(img, mask.size, centering=(0.5, 0.5))
-        output.putalpha(mask)
-        return output
+
+def serve_profile_picture(request, customer, transform):
+    if not customer.profile_picture:
+        return JsonResponse({"message": "No profile picture available"}, status=404)
+
+    profile_picture_path = customer.profile_picture.path
+    key = picture_cache.get_cache_key(profile_picture_path, transform)
+    etag = f'"{key}"'
+
+    content_type = imaging.CONTENT_TYPES[transform.image_format]
+
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+    elif imaging.is_unmodified(profile_picture_path, transform):
+        # the upload itself, never decoded
+        response = media.send_file(request, profile_picture_path, content_type, etag)
+    else:
+        cached_path = picture_cache.get(key, transform.image_format)
+        if cached_path is None:
+            with instrumentation.timer("pil"):
+                data = imaging.render_picture(profile_picture_path, transform)
+            cached_path = picture_cache.put(key, data, transform.image_format)
+        response = media.send_file(request, cached_path, content_type, etag)
+
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,23 @@
+import multiprocessing
+import os
+
+
+# SERVER_MODE=asgi serves fitnessmanager_api.asgi through uvicorn workers,
+# anything else serves fitnessmanager_api.wsgi through threaded workers.
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.getenv("WEB_TIMEOUT", 30))
+keepalive = 5
+
+# recycle workers now and then to cap slow memory growth
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 1000))
+max_requests_jitter = 100
+
+if os.getenv("SERVER_MODE", "wsgi") == "asgi":
+    wsgi_app = "fitnessmanager_api.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "fitnessmanager_api.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.getenv("WEB_THREADS", 4))